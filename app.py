@@ -7,17 +7,189 @@ This script orchestrates the entire automated registration reporting workflow:
 3. Generates formatted Excel template sheet
 4. Sends report via Gmail
 
+Stages run as a small dependency graph: loading the lookup table, reading the
+existing history and authenticating Gmail happen while the scraper is running.
+Once the data is processed, the template sheets are computed once in memory;
+saving the workbook and rendering/wrapping the email image then run side by
+side before the email is sent.
+
 All heavy lifting is done in sub-scripts for clean, maintainable code.
 """
 
 import os
 import sys
+import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import credentials_store as cs
+import data_processor
+import generate_template
+import gmail_sender
+from workbook_reader import sheet_names, read_sheet_cells
 
 # ================= CONFIGURATION =================
-EXCEL_TEMPLATE = 'Registration_Template.xlsx'
-RECIPIENT_EMAIL = "ankit.k@coolbootsmedia.com"
+EXCEL_TEMPLATE = data_processor.template_path
+RECIPIENT_EMAIL = gmail_sender.RECIPIENT_EMAIL
 EMAIL_SUBJECT = "📊 Automated Report - Registration Template"
+MAX_PARALLEL_STAGES = 4
+
+
+# ================= STAGES =================
+# Each stage receives the results of the stages it depends on.
+def scrape_stage(results):
+    # Kept in its own process: Playwright owns its event loop and browser
+    print("\n[SCRAPE] Downloading yesterday's registration data...")
+    subprocess.run([sys.executable, "techgig_scraper.py"], check=True)
+    print("✅ Registration data downloaded")
+
+
+def lookup_stage(results):
+    return data_processor.load_lookup()
+
+
+def history_stage(results):
+    return data_processor.load_existing_history()
+
+
+def gmail_auth_stage(results):
+    return gmail_sender.authenticate_gmail()
+
+
+def process_stage(results):
+    print("\n[PROCESS] Performing source lookup and appending to template...")
+    _, changed, history = data_processor.process_registrations(
+        lookup_dict=results['lookup'],
+        existing_df=results['history']
+    )
+    if changed:
+        print(f"✅ Data processed and appended to {EXCEL_TEMPLATE}")
+    else:
+        print(f"✅ Data unchanged - {EXCEL_TEMPLATE} left as is")
+    # The rebuilt history goes to output_stage so the pivot doesn't re-read the raw sheet
+    return changed, history
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+def output_stage(results):
+    """
+    Build the pivot once, then save the workbook and render + wrap the email image in parallel
+
+    The workbook save and the image/MIME branch only share the in-memory
+    rollups, so the time from pivot to sent email is the slower branch, not
+    the sum of both. The email goes out once both branches have finished.
+    """
+    print("\n[OUTPUT] Generating template sheets and email...")
+    changed, history = results['process']
+    if not changed and os.path.exists(EXCEL_TEMPLATE) and "Template" in sheet_names(EXCEL_TEMPLATE):
+        # Same data as last run - regenerating would only churn the binary file
+        print("✅ Data unchanged - existing template sheet is up to date")
+        _, cells = read_sheet_cells(EXCEL_TEMPLATE, gmail_sender.SHEET_NAME)
+        message = gmail_sender.build_report_message(cells)
+    else:
+        rollups, summary = generate_template.build_rollups(EXCEL_TEMPLATE, history_df=history)
+        template_cells = generate_template.rollup_cells(rollups[gmail_sender.SHEET_NAME])
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            branches = {
+                'save workbook': pool.submit(_timed, generate_template.save_rollup_sheets, EXCEL_TEMPLATE, rollups),
+                'image + message': pool.submit(_timed, gmail_sender.build_report_message, template_cells),
+            }
+            outputs = {name: future.result() for name, future in branches.items()}
+
+        for name, (_, seconds) in outputs.items():
+            print(f"   ⏱  {name} finished in {seconds:.1f}s")
+        message = outputs['image + message'][0]
+        generate_template.print_summary(EXCEL_TEMPLATE, rollups, summary)
+
+    print("\n[SEND] Sending via Gmail...")
+    gmail_sender.send_email(results['gmail_auth'], message)
+
+
+# name -> (dependencies, callable)
+# lookup, history and gmail_auth don't need the scrape, so they run while the
+# scraper waits on the network; the critical path is scrape -> process -> output.
+PIPELINE = {
+    'scrape': ([], scrape_stage),
+    'lookup': ([], lookup_stage),
+    'history': ([], history_stage),
+    'gmail_auth': ([], gmail_auth_stage),
+    'process': (['scrape', 'lookup', 'history'], process_stage),
+    'output': (['process', 'gmail_auth'], output_stage),
+}
+
+
+def _dependents(stages, failed):
+    """Every stage that depends, directly or indirectly, on one of the failed stages."""
+    blocked = set(failed)
+    changed = True
+    while changed:
+        changed = False
+        for name, (deps, _) in stages.items():
+            if name not in blocked and blocked.intersection(deps):
+                blocked.add(name)
+                changed = True
+    return blocked - set(failed)
+
+
+def run_stage_graph(stages, max_workers=MAX_PARALLEL_STAGES):
+    """
+    Run stages as soon as their dependencies have finished
+
+    When a stage fails, only the stages downstream of it are cancelled; the
+    rest still run (e.g. a Gmail auth error doesn't stop the scraped data from
+    being processed and stored). The first error is re-raised at the end.
+
+    Parameters:
+    stages (dict): name -> (list of dependency names, callable taking the results dict)
+    max_workers (int): Maximum number of stages running at once
+
+    Returns:
+    dict: name -> return value of each stage
+    """
+    results = {}
+    pending = dict(stages)
+    running = {}
+    started = {}
+    failed = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (deps, func) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    started[name] = time.perf_counter()
+                    running[pool.submit(func, results)] = name
+                    del pending[name]
+
+            if not running:
+                if failed:
+                    break
+                raise ValueError(f"Unsatisfiable stage dependencies: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    failed[name] = e
+                    print(f"   ❌ {name} failed after {time.perf_counter() - started[name]:.1f}s: {e}")
+                    # Cancel what needs this stage; independent stages keep going
+                    skipped = [stage for stage in _dependents(stages, failed) if stage in pending]
+                    for stage in skipped:
+                        del pending[stage]
+                    if skipped:
+                        print(f"   ⏭  Skipping {', '.join(skipped)} (depends on {name})")
+                    continue
+                print(f"   ⏱  {name} finished in {time.perf_counter() - started[name]:.1f}s")
+
+    if failed:
+        raise next(iter(failed.values()))
+    return results
 
 
 # ================= MAIN ORCHESTRATION =================
@@ -27,33 +199,17 @@ def main():
     print("="*60)
     
     try:
-        # STEP 1: Scrape TechGig Registration Data (Yesterday's Data)
-        print("\n[STEP 1/4] Running TechGig scraper...")
-        print("Downloading yesterday's registration data...")
-        result = subprocess.run([sys.executable, "techgig_scraper.py"], check=True)
-        print("✅ Registration data downloaded")
-        
-        # STEP 2: Process Data (Lookup + Append to Template)
-        print("\n[STEP 2/4] Processing registration data...")
-        print("Performing source lookup and appending to template...")
-        result = subprocess.run([sys.executable, "data_processor.py"], check=True)
-        print(f"✅ Data processed and appended to {EXCEL_TEMPLATE}")
-        
-        # STEP 3: Generate Formatted Excel Template Sheet
-        print("\n[STEP 3/4] Generating formatted template sheet...")
-        result = subprocess.run([sys.executable, "generate_template.py"], check=True)
+        start = time.perf_counter()
+        cs.require_live_data('app.py')
+        run_stage_graph(PIPELINE)
         final_template_path = os.path.abspath(EXCEL_TEMPLATE)
-        print(f"✅ Formatted template ready: {final_template_path}")
-        
-        # STEP 4: Send via Gmail
-        print("\n[STEP 4/4] Sending via Gmail...")
-        result = subprocess.run([sys.executable, "gmail_sender.py"], check=True)
         
         print("\n" + "="*60)
         print("🎉 AUTOMATION COMPLETE!")
         print("="*60)
         print(f"📊 Report generated: {final_template_path}")
         print(f"📧 Sent via Gmail to: {RECIPIENT_EMAIL}")
+        print(f"⏱  Total time: {time.perf_counter() - start:.1f}s")
         
     except subprocess.CalledProcessError as e:
         print("\n" + "="*60)
@@ -90,11 +246,16 @@ Report 4/
 ├── data_processor.py                   # Script 2
 ├── generate_template.py                # Script 3
 ├── gmail_sender.py                     # Script 4 (Gmail sender)
+├── report_service.py                   # Daemon mode (warm browser/lookup/Gmail)
 ├── credentials_store.py                # TechGig credentials
 ├── credentials.json                    # Gmail API credentials
 ├── token.pickle                        # Gmail API token (auto-generated)
 ├── Source_TG_Latest.xlsx               # Lookup file
-├── Registration_Template.xlsx          # Main template
+├── history_store.py                    # Daily history partitions
+├── bulk_ingest.py                      # Rebuild history from a folder of archived exports
+├── artifacts.py                        # Optional intermediate files (ARTIFACT_FORMAT)
+├── history/                            # One CSV per day (committed)
+├── Registration_Template.xlsx          # Main template (rebuilt from history/)
 └── exports/                            # Generated files
 
 ### **Prerequisites:**
@@ -105,5 +266,11 @@ Report 4/
 ### **Usage:**
 python app.py
 
-This will run all 4 scripts in sequence automatically!
+This will run all 4 steps automatically, overlapping the independent ones!
+
+For frequent or on-demand reruns, keep everything warm instead:
+python report_service.py        # then: curl -X POST "http://127.0.0.1:8787/run?wait=1"
+
+To backfill history from archived exports in one pass:
+python bulk_ingest.py path/to/exports
 """
\ No newline at end of file
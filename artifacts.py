@@ -0,0 +1,137 @@
+"""
+INTERMEDIATE ARTIFACTS
+======================
+Optional copies of intermediate data (e.g. exports/Processed_User_Summary_*)
+that nothing downstream reads. Writing them used to cost a full openpyxl
+serialization on every run; now the format is chosen per environment:
+
+    ARTIFACT_FORMAT       none (default) | csv | parquet | xlsx
+    ARTIFACT_COMPRESSION  csv: gzip, bz2, xz, zstd, zip; parquet: snappy, gzip, zstd, brotli
+    ARTIFACT_KEEP         keep this many newest days of artifacts per name (default 14, 0 = keep all)
+    ARTIFACT_MAX_AGE_DAYS also delete artifacts older than this (default 0 = no age limit)
+    DEBUG_ARTIFACTS       true -> always write the legacy xlsx (exports/<name>.xlsx) as well
+
+Artifacts are named <name>_<YYYY-MM-DD>.<ext> after the day they hold, so
+retention can tell old from new. Parquet needs pyarrow; without it the
+artifact falls back to CSV.
+"""
+
+import glob
+import os
+import re
+import time
+
+from history_store import format_dates, write_history_xlsx
+
+# ================= CONFIGURATION =================
+ARTIFACT_FORMAT = os.getenv('ARTIFACT_FORMAT', 'none').lower()
+ARTIFACT_COMPRESSION = os.getenv('ARTIFACT_COMPRESSION') or None
+ARTIFACT_KEEP = int(os.getenv('ARTIFACT_KEEP', '14'))
+ARTIFACT_MAX_AGE_DAYS = int(os.getenv('ARTIFACT_MAX_AGE_DAYS', '0'))
+DEBUG_ARTIFACTS = os.getenv('DEBUG_ARTIFACTS', 'false').lower() == 'true'
+
+FORMATS = ('none', 'csv', 'parquet', 'xlsx')
+CSV_EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst', 'zip': '.zip'}
+
+
+def artifact_path(directory, name, day, fmt, compression=None):
+    """exports/<name>_<YYYY-MM-DD>.<ext>; compressed CSVs get a second extension (.csv.gz)."""
+    ext = {'csv': '.csv', 'parquet': '.parquet', 'xlsx': '.xlsx'}[fmt]
+    if fmt == 'csv' and compression:
+        ext += CSV_EXTENSIONS.get(compression, '.' + compression)
+    return os.path.join(directory, f"{name}_{day.strftime('%Y-%m-%d')}{ext}")
+
+
+def _write(df, path, fmt, compression):
+    if fmt == 'csv':
+        # Same dd-mm-YYYY text the history partitions use
+        df.assign(Date=format_dates(df['Date'])).to_csv(path, index=False, compression=compression)
+    elif fmt == 'parquet':
+        # Dates stay a native date column
+        df.to_parquet(path, index=False, compression=compression or 'snappy')
+    else:
+        write_history_xlsx(df, path)
+
+
+def prune_artifacts(directory, name, keep=ARTIFACT_KEEP, max_age_days=ARTIFACT_MAX_AGE_DAYS, protect=()):
+    """
+    Apply the retention policy to <name>_<date>.* artifacts
+
+    Parameters:
+    directory (str): Folder holding the artifacts
+    name (str): Artifact base name
+    keep (int): Newest days to keep, whatever their format (0 = no count limit)
+    max_age_days (int): Delete artifacts whose date is older than this (0 = no age limit)
+    protect (iterable): Paths never deleted (the artifact just written)
+
+    Returns the list of deleted paths.
+    """
+    dated = re.compile(re.escape(name) + r'_(\d{4}-\d{2}-\d{2})\.')
+    by_day = {}
+    for path in glob.glob(os.path.join(directory, f"{glob.escape(name)}_*")):
+        match = dated.match(os.path.basename(path))
+        if match:
+            by_day.setdefault(match.group(1), []).append(path)
+
+    # ISO dates sort chronologically; newest first
+    days = sorted(by_day, reverse=True)
+    kept = set(days[:keep]) if keep else set(days)
+    if max_age_days:
+        cutoff = time.strftime('%Y-%m-%d', time.localtime(time.time() - max_age_days * 86400))
+        kept = {day for day in kept if day >= cutoff}
+
+    protect = {os.path.abspath(p) for p in protect}
+    deleted = []
+    for day in days:
+        if day in kept:
+            continue
+        for path in by_day[day]:
+            if os.path.abspath(path) not in protect:
+                os.remove(path)
+                deleted.append(path)
+    return deleted
+
+
+def write_artifact(df, directory, name, day, fmt=None, compression=None):
+    """
+    Write an intermediate DataFrame in the configured format and prune old copies
+
+    Parameters:
+    df (DataFrame): Rows to keep (must have a Date column)
+    directory (str): Output folder (e.g. exports/)
+    name (str): Artifact base name
+    day (datetime): Day the rows belong to, used in the file name
+    fmt (str): none | csv | parquet | xlsx (default: ARTIFACT_FORMAT)
+    compression (str): Codec for csv/parquet (default: ARTIFACT_COMPRESSION)
+
+    Returns the paths written (empty when fmt is 'none' and debug is off).
+    """
+    fmt = (fmt or ARTIFACT_FORMAT).lower()
+    compression = compression or ARTIFACT_COMPRESSION
+    if fmt not in FORMATS:
+        raise ValueError(f"ARTIFACT_FORMAT must be one of {', '.join(FORMATS)} (got {fmt!r})")
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("⚠️  pyarrow not installed - writing the artifact as CSV instead")
+            fmt, compression = 'csv', None
+
+    if fmt != 'none':
+        path = artifact_path(directory, name, day, fmt, compression if fmt != 'xlsx' else None)
+        _write(df, path, fmt, compression)
+        written.append(path)
+        for old in prune_artifacts(directory, name, protect=[path]):
+            print(f"   Removed old artifact {os.path.basename(old)}")
+
+    if DEBUG_ARTIFACTS:
+        # Legacy fixed-name workbook, as before the artifact layer existed
+        legacy = os.path.join(directory, f"{name}.xlsx")
+        write_history_xlsx(df, legacy)
+        written.append(legacy)
+
+    return written
@@ -0,0 +1,73 @@
+"""
+FAKE GMAIL SEND ENDPOINT
+========================
+Accepts the Gmail API `users.messages.send` call made by gmail_sender.py and
+records what was sent instead of delivering it.
+
+Point gmail_sender.py at it with GMAIL_API_ENDPOINT=<base_url>/
+
+Usage:
+    python -m benchmarks.gmail_stub --port 8766
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GmailStubHandler(BaseHTTPRequestHandler):
+    # Shared across requests; inspected by the benchmark runner
+    sent_messages = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+
+        if not self.path.split('?')[0].endswith('/messages/send'):
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+            return
+
+        raw = json.loads(body or b'{}').get('raw', '')
+        with self.lock:
+            self.sent_messages.append({'path': self.path, 'raw_bytes': len(raw)})
+            message_id = f"stub-{len(self.sent_messages)}"
+        self._send_json(200, {'id': message_id, 'threadId': message_id, 'labelIds': ['SENT']})
+
+
+def start_gmail_stub(port=0):
+    """
+    Start the stub in a background thread
+
+    Returns (server, base_url). Sent messages are in GmailStubHandler.sent_messages.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), GmailStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake Gmail send endpoint")
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), GmailStubHandler)
+    print(f"✓ Gmail stub listening on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nMessages received: {len(GmailStubHandler.sent_messages)}")
+        server.shutdown()
@@ -0,0 +1,166 @@
+"""
+LOCAL TECHGIG MIS STAND-IN
+==========================
+A tiny HTTP server that mimics the three MIS pages techgig_scraper.py drives:
+
+- /mis/link.php              Login form ("Login ID" / "Password" / Submit)
+- /mis/mis_tg_reg_stats.php  Date-range selects, Search button and the stats table
+- /mis/export.php            CSV download behind the "Total of Registration" links
+
+Point the scraper at it with TECHGIG_LOGIN_URL / TECHGIG_STATS_URL.
+
+Usage:
+    python -m benchmarks.mis_stub --csv exports/Registered_User_Source_Summary.csv --port 8765
+"""
+
+import argparse
+import os
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# ================= CONFIGURATION =================
+LOGIN_PATH = '/mis/link.php'
+STATS_PATH = '/mis/mis_tg_reg_stats.php'
+EXPORT_PATH = '/mis/export.php'
+SESSION_COOKIE = 'mis_session=stub'
+
+LOGIN_PAGE = """<html><head><title>MIS Login</title></head><body>
+<form method="post" action="{login_path}">
+  <div><label>Login ID</label> <input type="text" name="login_id"></div>
+  <div><label>Password</label> <input type="password" name="password"></div>
+  <button type="submit">Submit</button>
+</form>
+</body></html>"""
+
+STATS_PAGE = """<html><head><title>Registration Stats</title></head><body>
+<form method="get" action="{stats_path}">
+  <div>
+    <select id="start_day" name="start_day">{days}</select>
+    <select id="start_month" name="start_month">{months}</select>
+    <select id="start_year" name="start_year">{years}</select>
+    <select id="end_day" name="end_day">{days}</select>
+    <select id="end_month" name="end_month">{months}</select>
+    <select id="end_year" name="end_year">{years}</select>
+    <button type="submit">Search</button>
+  </div>
+</form>
+{table}
+</body></html>"""
+
+
+def _options(values):
+    return ''.join(f'<option value="{v}">{v}</option>' for v in values)
+
+
+def _stats_table(start, end):
+    rows = ['<tr><th>Date</th><th>Total of Registration</th></tr>',
+            '<tr><td>Average</td><td>-</td></tr>']
+    day = end
+    while day >= start:
+        rows.append(
+            f'<tr><td>{day.isoformat()}</td>'
+            f'<td><a href="{EXPORT_PATH}?date={day.isoformat()}">120</a></td></tr>'
+        )
+        day -= timedelta(days=1)
+    return '<table>' + ''.join(rows) + '</table>'
+
+
+def make_handler(csv_path):
+    """Build a request handler class that serves csv_path as the export."""
+
+    class MISStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _logged_in(self):
+            return SESSION_COOKIE in (self.headers.get('Cookie') or '')
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == LOGIN_PATH:
+                self._send(200, LOGIN_PAGE.format(login_path=LOGIN_PATH).encode())
+            elif url.path == STATS_PATH:
+                if not self._logged_in():
+                    self._send(302, headers={'Location': LOGIN_PATH})
+                    return
+                table = ''
+                if 'start_day' in query:
+                    start = date(int(query['start_year']), int(query['start_month']), int(query['start_day']))
+                    end = date(int(query['end_year']), int(query['end_month']), int(query['end_day']))
+                    table = _stats_table(start, end)
+                page = STATS_PAGE.format(
+                    stats_path=STATS_PATH,
+                    days=_options(range(1, 32)),
+                    months=_options(range(1, 13)),
+                    years=_options(range(2015, date.today().year + 2)),
+                    table=table
+                )
+                self._send(200, page.encode())
+            elif url.path == EXPORT_PATH:
+                with open(csv_path, 'rb') as f:
+                    body = f.read()
+                self._send(200, body, content_type='text/csv', headers={
+                    'Content-Disposition': 'attachment; filename="Registered_User_Source_Summary.csv"'
+                })
+            else:
+                self._send(404, b'Not found')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            self.rfile.read(length)
+            if urlparse(self.path).path == LOGIN_PATH:
+                self._send(302, headers={'Location': STATS_PATH, 'Set-Cookie': f'{SESSION_COOKIE}; Path=/'})
+            else:
+                self._send(404, b'Not found')
+
+    return MISStubHandler
+
+
+def start_mis_stub(csv_path, port=0):
+    """
+    Start the stub in a background thread
+
+    Returns (server, base_url). Call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(csv_path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, base_url
+
+
+def scraper_env(base_url):
+    """Environment variables that point techgig_scraper.py at the stub."""
+    return {
+        'TECHGIG_LOGIN_URL': base_url + LOGIN_PATH,
+        'TECHGIG_STATS_URL': base_url + STATS_PATH,
+        'TECHGIG_USERNAME': 'bench',
+        'TECHGIG_PASSWORD': 'bench',
+        'HEADLESS': 'true',
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the local TechGig MIS stand-in")
+    parser.add_argument('--csv', required=True, help="CSV served by the export link")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(os.path.abspath(args.csv)))
+    print(f"✓ MIS stub listening on http://127.0.0.1:{args.port}{LOGIN_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,329 @@
+"""
+PIPELINE BENCHMARK RUNNER
+=========================
+Times every stage of the report pipeline offline, at several data scales:
+
+    scrape   - techgig_scraper.py against benchmarks/mis_stub.py
+    process  - data_processor.py
+    template - generate_template.py
+    email    - gmail_sender.py against benchmarks/gmail_stub.py
+
+Each scale gets a fresh throw-away workspace (copy of the scripts + synthetic
+history partitions and export from benchmarks/synthetic_data.py). Stages run
+as subprocesses, so timings include interpreter start-up and imports.
+
+Scale 1x is ~30 days of history at ~120 registrations/day (production size
+today); 10x and 100x multiply the number of days.
+
+Usage:
+    python -m benchmarks.run_benchmarks                       # run + compare to baseline
+    python -m benchmarks.run_benchmarks --scales 1,10          # subset of scales
+    python -m benchmarks.run_benchmarks --save-baseline        # store results as new baseline
+    python -m benchmarks.run_benchmarks --stages process,template
+    python -m benchmarks.run_benchmarks --stages scrape --scrape-recording recordings/latest
+
+No baseline is committed: timings depend on the machine, so create one on
+the machine that runs the comparison (--save-baseline) before relying on the
+regression check. Without benchmarks/baseline.json a run only reports timings.
+
+Exit code is 1 when any stage fails, or regressed against (or has no result
+for a stage recorded in) benchmarks/baseline.json.
+"""
+
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_data import DEFAULT_ROWS_PER_DAY, generate_workspace
+from benchmarks.mis_stub import start_mis_stub, scraper_env
+from benchmarks.gmail_stub import GmailStubHandler, start_gmail_stub
+
+# ================= CONFIGURATION =================
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, 'benchmarks', 'baseline.json')
+
+BASE_DAYS = 30
+DEFAULT_SCALES = [1, 10, 100]
+STAGES = ['scrape', 'process', 'template', 'email']
+STAGE_SCRIPTS = {
+    'scrape': 'techgig_scraper.py',
+    'process': 'data_processor.py',
+    'template': 'generate_template.py',
+    'email': 'gmail_sender.py',
+}
+
+# A stage regresses when it is slower than baseline by more than the
+# relative tolerance AND by more than the absolute floor (filters timer noise)
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA_SECONDS = 0.5
+
+
+def prepare_workspace(scale, rows_per_day, seed):
+    """Copy the pipeline scripts and generate synthetic data for one scale."""
+    workspace = tempfile.mkdtemp(prefix=f'bench_{scale}x_')
+    for script in glob.glob(os.path.join(REPO_DIR, '*.py')):
+        shutil.copy(script, workspace)
+    generate_workspace(workspace, days=BASE_DAYS * scale, rows_per_day=rows_per_day, seed=seed)
+    return workspace
+
+
+def stage_available(stage):
+    """Return a reason string when a stage cannot run here, else None."""
+    if stage == 'scrape' and importlib.util.find_spec('playwright') is None:
+        return "playwright not installed"
+    if stage == 'email' and importlib.util.find_spec('googleapiclient') is None:
+        return "google-api-python-client not installed"
+    return None
+
+
+# Stages that change the workspace state they read. Each sample starts from
+# the freshly generated state, otherwise every process run after the first
+# would hit the unchanged-data skip path instead of doing a real ingest.
+STATEFUL_STAGES = {'process'}
+STATE_PATHS = ['history', 'Registration_Template.xlsx']
+
+
+def snapshot_state(workspace):
+    """Copy the history and template of a workspace aside, for restore_state()."""
+    snapshot = tempfile.mkdtemp(prefix='bench_state_')
+    for rel in STATE_PATHS:
+        src = os.path.join(workspace, rel)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(snapshot, rel))
+        elif os.path.exists(src):
+            shutil.copy2(src, os.path.join(snapshot, rel))
+    return snapshot
+
+
+def restore_state(workspace, snapshot):
+    """Put the workspace history and template back to the snapshot."""
+    for rel in STATE_PATHS:
+        dst = os.path.join(workspace, rel)
+        if os.path.isdir(dst):
+            shutil.rmtree(dst)
+        elif os.path.exists(dst):
+            os.remove(dst)
+        src = os.path.join(snapshot, rel)
+        if os.path.isdir(src):
+            shutil.copytree(src, dst)
+        elif os.path.exists(src):
+            shutil.copy2(src, dst)
+
+
+def time_stage(stage, workspace, env):
+    """Run one stage script in the workspace and return elapsed seconds."""
+    script = os.path.join(workspace, STAGE_SCRIPTS[stage])
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, script], cwd=workspace, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        tail = '\n'.join(result.stdout.splitlines()[-15:])
+        raise RuntimeError(f"{STAGE_SCRIPTS[stage]} exited with {result.returncode}:\n{tail}")
+    return elapsed
+
+
+def replay_env(recording_dir):
+    """Env that makes techgig_scraper.py replay a recorded session instead of using the stub."""
+    recording_dir = os.path.abspath(recording_dir)
+    with open(os.path.join(recording_dir, 'session.json')) as f:
+        session = json.load(f)
+    return {
+        'SCRAPER_MODE': 'replay',
+        'SCRAPER_RECORDING_DIR': recording_dir,
+        'TECHGIG_LOGIN_URL': session['login_url'],
+        'TECHGIG_STATS_URL': session['stats_url'],
+        'HEADLESS': 'true',
+    }
+
+
+def run_scale(scale, stages, repeat, rows_per_day, seed, keep, scrape_recording=None):
+    """Benchmark all requested stages at one data scale."""
+    print(f"\n[SCALE {scale}x] Generating {BASE_DAYS * scale} days of history...")
+    workspace = prepare_workspace(scale, rows_per_day, seed)
+    csv_path = os.path.join(workspace, 'exports', 'Registered_User_Source_Summary.csv')
+
+    snapshot = snapshot_state(workspace)
+    mis_server, mis_url = start_mis_stub(csv_path)
+    gmail_server, gmail_url = start_gmail_stub()
+    env = dict(os.environ)
+    env.update(replay_env(scrape_recording) if scrape_recording else scraper_env(mis_url))
+    env['GMAIL_API_ENDPOINT'] = gmail_url
+    env['PYTHONIOENCODING'] = 'utf-8'
+
+    # The stub's message list is class-level; start each scale from empty
+    with GmailStubHandler.lock:
+        GmailStubHandler.sent_messages.clear()
+
+    timings = {}
+    failures = []
+    try:
+        for stage in stages:
+            reason = stage_available(stage)
+            if reason:
+                print(f"   - {stage:<9} skipped ({reason})")
+                continue
+            samples = []
+            try:
+                for _ in range(repeat):
+                    if stage in STATEFUL_STAGES:
+                        restore_state(workspace, snapshot)
+                    samples.append(time_stage(stage, workspace, env))
+            except RuntimeError as e:
+                print(f"   ✗ {stage:<9} failed\n{e}")
+                failures.append(f"{stage} @ {scale}x failed")
+                continue
+            if stage == 'email' and len(GmailStubHandler.sent_messages) != repeat:
+                # Every sample must send exactly one message, or it timed nothing useful
+                print(f"   ✗ {stage:<9} Gmail stub received {len(GmailStubHandler.sent_messages)} "
+                      f"message(s) for {repeat} sample(s)")
+                failures.append(f"email @ {scale}x sent {len(GmailStubHandler.sent_messages)} of {repeat} message(s)")
+                continue
+            timings[stage] = round(statistics.median(samples), 3)
+            print(f"   ✓ {stage:<9} {timings[stage]:8.3f}s")
+    finally:
+        mis_server.shutdown()
+        gmail_server.shutdown()
+        shutil.rmtree(snapshot, ignore_errors=True)
+        if keep:
+            print(f"   Workspace kept: {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    return timings, failures
+
+
+def compare_to_baseline(results, baseline, tolerance, stages=STAGES):
+    """
+    Return a list of human-readable regression descriptions
+
+    A requested stage that has a baseline entry but no result (it failed or
+    could not run) counts as a regression.
+    """
+    regressions = []
+    for scale, timings in results.items():
+        for stage in stages:
+            base = baseline.get(scale, {}).get(stage)
+            if base is None:
+                continue
+            seconds = timings.get(stage)
+            if seconds is None:
+                regressions.append(f"{stage} @ {scale}x: {base:.3f}s in baseline, no result now")
+                continue
+            if seconds > base * (1 + tolerance) and seconds - base > MIN_DELTA_SECONDS:
+                regressions.append(f"{stage} @ {scale}x: {base:.3f}s -> {seconds:.3f}s "
+                                   f"(+{(seconds / base - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_summary(results, baseline):
+    print("\n" + "="*60)
+    print("BENCHMARK RESULTS (seconds, median)")
+    print("="*60)
+    print(f"{'scale':<8}" + ''.join(f"{s:>12}" for s in STAGES))
+    for scale, stages in results.items():
+        cells = []
+        for stage in STAGES:
+            if stage not in stages:
+                cells.append(f"{'-':>12}")
+                continue
+            base = baseline.get(scale, {}).get(stage)
+            delta = f"({(stages[stage] / base - 1) * 100:+.0f}%)" if base else ''
+            cells.append(f"{stages[stage]:>6.2f}{delta:>6}")
+        print(f"{scale + 'x':<8}" + ''.join(cells))
+    print("="*60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the registration report pipeline offline")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated data scales (default: 1,10,100)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stages to time")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per stage (median is reported)")
+    parser.add_argument('--rows-per-day', type=int, default=DEFAULT_ROWS_PER_DAY)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown before flagging a regression")
+    parser.add_argument('--output', help="Also write results JSON to this path")
+    parser.add_argument('--keep', action='store_true', help="Keep generated workspaces")
+    parser.add_argument('--scrape-recording',
+                        help="Time the scrape by replaying this SCRAPER_MODE=record directory instead of the stub")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    failures = []
+    for scale in scales:
+        results[str(scale)], scale_failures = run_scale(
+            scale, stages, args.repeat, args.rows_per_day, args.seed, args.keep, args.scrape_recording)
+        failures.extend(scale_failures)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    print_summary(results, baseline)
+
+    payload = {
+        'machine': platform.platform(),
+        'python': platform.python_version(),
+        'rows_per_day': args.rows_per_day,
+        'base_days': BASE_DAYS,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(payload, f, indent=2)
+
+    if failures:
+        print("❌ Stage failures:")
+        for line in failures:
+            print(f"   - {line}")
+
+    if args.save_baseline:
+        if failures:
+            print("✗ Not saving a baseline from a run with failed stages")
+            return 1
+        with open(args.baseline, 'w') as f:
+            json.dump(payload, f, indent=2)
+        print(f"✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("No baseline found - nothing compared. Run with --save-baseline on this machine to create one.")
+        return 1 if failures else 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance, stages)
+    if regressions:
+        print("❌ Performance regressions detected:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    if failures:
+        return 1
+
+    print("✓ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
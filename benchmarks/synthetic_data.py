@@ -0,0 +1,175 @@
+"""
+SYNTHETIC DATA GENERATOR
+========================
+Produces realistic stand-ins for the two inputs of the pipeline:
+
+1. exports/Registered_User_Source_Summary.csv - one day's MIS export
+2. history/ + Registration_Template.xlsx        - the multi-day history
+
+Registration Sources are drawn from the Category sheet of Source_TG_Latest.xlsx
+(plus a few unmapped ones) so the lookup in data_processor.py behaves as it
+does on real data.
+
+Usage:
+    python -m benchmarks.synthetic_data --days 365 --rows-per-day 120 --out bench_ws
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from history_store import write_history_xlsx, write_partitions
+
+# ================= CONFIGURATION =================
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOOKUP_PATH = os.path.join(REPO_DIR, 'Source_TG_Latest.xlsx')
+
+# Real history averages ~115 registrations per day
+DEFAULT_ROWS_PER_DAY = 120
+
+# Weighted the way the production history is (mostly Google sign-ups)
+REGISTRATION_TYPES = [('Google', 0.90), ('TG', 0.06), ('TGMobile Webservice', 0.02), ('LinkedIn', 0.02)]
+CAMPAIGN_SOURCES = [('google', 0.88), ('', 0.05), ('linkedin', 0.02), ('TG_batch', 0.02),
+                    ('Mailer', 0.01), ('EX_batch', 0.01), ('FB', 0.01)]
+UNMAPPED_SOURCES = ['unknown_partner', 'test_source', 'SM_new']
+UNMAPPED_RATE = 0.02
+
+# Extra columns the MIS export carries and data_processor.py prunes away
+EXTRA_COLUMNS = ['User ID', 'Registration Date', 'Country', 'Device']
+
+
+def _weighted(rng, choices, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def load_lookup_sources(lookup_path=LOOKUP_PATH):
+    """Return the Registration Source keys (Category sheet, column B)."""
+    lookup_df = pd.read_excel(lookup_path, sheet_name='Category')
+    return [str(v) for v in lookup_df[lookup_df.columns[1]].dropna().unique()]
+
+
+def _source_choices(lookup_sources):
+    # The two sources that dominate production data, then a long tail
+    head = [('content_google', 0.85), ('google', 0.09), ('direct', 0.03)]
+    tail_weight = (1.0 - sum(w for _, w in head) - UNMAPPED_RATE) / max(len(lookup_sources), 1)
+    tail = [(s, tail_weight) for s in lookup_sources]
+    unmapped = [(s, UNMAPPED_RATE / len(UNMAPPED_SOURCES)) for s in UNMAPPED_SOURCES]
+    return head + tail + unmapped
+
+
+def generate_export_csv(path, rows, day, lookup_sources=None, seed=0):
+    """
+    Write a synthetic Registered_User_Source_Summary.csv for a single day
+
+    Parameters:
+    path (str): Destination CSV path
+    rows (int): Number of registrations in the export
+    day (datetime): Registration day the export represents
+    lookup_sources (list): Registration Source keys to draw from
+    seed (int): Random seed for reproducible output
+    """
+    rng = random.Random(seed)
+    lookup_sources = lookup_sources if lookup_sources is not None else load_lookup_sources()
+    source_choices = _source_choices(lookup_sources)
+
+    df = pd.DataFrame({
+        'User ID': [f"U{seed:04d}{i:07d}" for i in range(rows)],
+        'Registration Date': day.strftime('%Y-%m-%d'),
+        'Registration Type': _weighted(rng, REGISTRATION_TYPES, rows),
+        'Registration Source': _weighted(rng, source_choices, rows),
+        'Campaign Source': _weighted(rng, CAMPAIGN_SOURCES, rows),
+        'Country': 'India',
+        'Device': _weighted(rng, [('Desktop', 0.6), ('Mobile', 0.4)], rows),
+    })
+    df['Campaign Source'] = df['Campaign Source'].replace('', None)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def generate_history(path, days, rows_per_day=DEFAULT_ROWS_PER_DAY, end_date=None,
+                     lookup_path=LOOKUP_PATH, seed=0):
+    """
+    Write a synthetic history: daily partitions (history/ next to path) plus the xlsx built from them
+
+    Parameters:
+    path (str): Destination xlsx path
+    days (int): Number of consecutive days of history
+    rows_per_day (int): Average registrations per day (actual count varies +/-30%)
+    end_date (datetime): Most recent day in the history (defaults to two days ago)
+    lookup_path (str): Lookup workbook used to assign 'New Source'
+    seed (int): Random seed for reproducible output
+    """
+    rng = random.Random(seed)
+    end_date = end_date or (datetime.now() - timedelta(days=2))
+
+    lookup_df = pd.read_excel(lookup_path, sheet_name='Category')
+    lookup_dict = dict(zip(lookup_df[lookup_df.columns[1]], lookup_df[lookup_df.columns[2]]))
+    source_choices = _source_choices([str(v) for v in lookup_dict])
+
+    frames = []
+    for offset in range(days):
+        day = end_date - timedelta(days=offset)
+        rows = max(1, int(rows_per_day * rng.uniform(0.7, 1.3)))
+        frames.append(pd.DataFrame({
+            'Date': pd.Timestamp(day).normalize(),
+            'Registration Type': _weighted(rng, REGISTRATION_TYPES, rows),
+            'Registration Source': _weighted(rng, source_choices, rows),
+            'Campaign Source': _weighted(rng, CAMPAIGN_SOURCES, rows),
+        }))
+
+    df = pd.concat(frames, ignore_index=True)
+    df['Campaign Source'] = df['Campaign Source'].replace('', None)
+    df['New Source'] = df['Registration Source'].map(lookup_dict).fillna('')
+
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    history_dir = os.path.join(out_dir, 'history')
+    write_partitions(df, history_dir, os.path.join(history_dir, 'fingerprints.json'))
+    write_history_xlsx(df, path)
+    return path
+
+
+def generate_workspace(out_dir, days, rows_per_day=DEFAULT_ROWS_PER_DAY, seed=0):
+    """
+    Create a complete pipeline workspace: history, yesterday's export and lookup
+
+    Returns a dict with the generated file paths.
+    """
+    os.makedirs(os.path.join(out_dir, 'exports'), exist_ok=True)
+    yesterday = datetime.now() - timedelta(days=1)
+
+    template_path = generate_history(
+        os.path.join(out_dir, 'Registration_Template.xlsx'),
+        days=days, rows_per_day=rows_per_day, seed=seed
+    )
+    csv_path = generate_export_csv(
+        os.path.join(out_dir, 'exports', 'Registered_User_Source_Summary.csv'),
+        rows=rows_per_day, day=yesterday, lookup_sources=load_lookup_sources(), seed=seed + 1
+    )
+
+    lookup_copy = os.path.join(out_dir, 'Source_TG_Latest.xlsx')
+    if os.path.abspath(lookup_copy) != os.path.abspath(LOOKUP_PATH):
+        with open(LOOKUP_PATH, 'rb') as src, open(lookup_copy, 'wb') as dst:
+            dst.write(src.read())
+
+    return {'template': template_path, 'csv': csv_path, 'lookup': lookup_copy}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic registration data")
+    parser.add_argument('--out', default='bench_workspace', help="Output directory")
+    parser.add_argument('--days', type=int, default=30, help="Days of history to generate")
+    parser.add_argument('--rows-per-day', type=int, default=DEFAULT_ROWS_PER_DAY)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_workspace(args.out, args.days, args.rows_per_day, args.seed)
+    print("✓ Synthetic workspace generated:")
+    for name, path in paths.items():
+        print(f"   {name}: {path}")
@@ -0,0 +1,186 @@
+"""
+BULK HISTORY INGEST
+===================
+Rebuilds history from a folder of archived MIS exports in one go, instead of
+running data_processor.py once per file (which rewrites the whole template
+every time).
+
+1. The date each export covers is parsed from its file name
+   (2026-02-14, 14-02-2026 or 20260214 anywhere in the name).
+2. Each file is handled end to end in a process pool (one task per file):
+   read, column-prune, look up, encode the day's partition bytes,
+   fingerprint it and collect its Registration Sources. Throughput scales
+   with cores.
+3. The parent only writes the returned partitions in date order, merges
+   the fingerprints and source index (each saved once) and rebuilds
+   Registration_Template.xlsx once.
+
+Exports downloaded by the daily run contain the *previous* day's data; pass
+--download-dates when the file names carry the download date instead.
+
+Usage:
+    python bulk_ingest.py archive/exports
+    python bulk_ingest.py archive/exports --pattern "Registered_*.csv" --workers 8
+    python bulk_ingest.py archive/exports --download-dates --dry-run
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from data_processor import load_lookup, prepare_export, template_path
+from history_store import (
+    DATE_FORMAT, build_workbook, fingerprint_rows, partition_bytes, write_encoded_partitions
+)
+from history_remap import remap_history
+
+# ================= CONFIGURATION =================
+# (regex, strptime format) tried in order against the file name
+DATE_PATTERNS = [
+    (re.compile(r'(\d{4}-\d{2}-\d{2})'), '%Y-%m-%d'),
+    (re.compile(r'(\d{2}-\d{2}-\d{4})'), DATE_FORMAT),
+    (re.compile(r'(?<!\d)(\d{8})(?!\d)'), '%Y%m%d'),
+]
+
+
+def date_from_filename(path, download_dates=False):
+    """
+    Date covered by an export, from its file name (None if there is none)
+
+    Parameters:
+    path (str): Export file path
+    download_dates (bool): The name holds the download date, i.e. the day after the data
+    """
+    name = os.path.basename(path)
+    for pattern, fmt in DATE_PATTERNS:
+        match = pattern.search(name)
+        if not match:
+            continue
+        try:
+            day = datetime.strptime(match.group(1), fmt)
+        except ValueError:
+            continue
+        if download_dates:
+            day -= timedelta(days=1)
+        return pd.Timestamp(day)
+    return None
+
+
+def find_exports(folder, pattern='*.csv', download_dates=False):
+    """Return [(path, day)] for every dated export, skipping files without a date."""
+    exports = []
+    for path in sorted(glob.glob(os.path.join(folder, pattern))):
+        day = date_from_filename(path, download_dates)
+        if day is None:
+            print(f"⚠️  Skipping {os.path.basename(path)}: no date in file name")
+            continue
+        exports.append((path, day))
+    return exports
+
+
+# ================= WORKER PROCESSES =================
+_worker_lookup = None
+
+
+def _init_worker(lookup_dict):
+    # The lookup is shipped once per worker, not once per file
+    global _worker_lookup
+    _worker_lookup = lookup_dict
+
+
+def _ingest_file(task):
+    """Everything per-day that doesn't touch shared files, done in the worker."""
+    path, day = task
+    df = prepare_export(path, day, _worker_lookup)
+    return {
+        'date': day.strftime(DATE_FORMAT),
+        'rows': len(df),
+        'payload': partition_bytes(df),
+        'sha256': fingerprint_rows(df),
+        'sources': df['Registration Source'].fillna('').astype(str).unique().tolist(),
+    }
+
+
+def ingest_exports(exports, lookup_dict, workers=None):
+    """
+    Parse, look up and encode every export across a process pool
+
+    Returns one dict per day (see history_store.write_encoded_partitions),
+    oldest date first. When several files cover the same date, the last one
+    (by file name) wins.
+    """
+    by_date = {}
+    for path, day in exports:
+        if day in by_date:
+            print(f"⚠️  {os.path.basename(path)} replaces {os.path.basename(by_date[day])} "
+                  f"for {day.strftime(DATE_FORMAT)}")
+        by_date[day] = path
+
+    tasks = [(path, day) for day, path in sorted(by_date.items())]
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lookup_dict,)) as pool:
+        days = list(pool.map(_ingest_file, tasks, chunksize=chunksize))
+
+    # pool.map keeps task order, so the days are already date-sorted
+    for day in days:
+        if not day['rows']:
+            print(f"⚠️  Skipping {day['date']}: export has no rows")
+    return [day for day in days if day['rows']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest a folder of dated MIS exports into history/")
+    parser.add_argument('folder', help="Folder containing the archived export CSVs")
+    parser.add_argument('--pattern', default='*.csv', help="File name glob inside the folder (default: *.csv)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per core)")
+    parser.add_argument('--download-dates', action='store_true',
+                        help="File names carry the download date; data is for the day before")
+    parser.add_argument('--dry-run', action='store_true', help="Parse everything but write nothing")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"✗ Error: {args.folder} is not a folder")
+        return 1
+
+    exports = find_exports(args.folder, args.pattern, args.download_dates)
+    if not exports:
+        print(f"✗ Error: No dated exports matching {args.pattern} in {args.folder}")
+        return 1
+
+    print("="*60)
+    print("BULK INGEST")
+    print("="*60)
+    print(f"📂 {len(exports)} export(s) in {args.folder}")
+
+    started = time.perf_counter()
+    lookup_dict = load_lookup()
+    days = ingest_exports(exports, lookup_dict, args.workers)
+    parsed = time.perf_counter() - started
+    rows = sum(day['rows'] for day in days)
+    print(f"✓ Processed {rows} rows for {len(days)} day(s) in {parsed:.1f}s ({rows / max(parsed, 1e-9):,.0f} rows/s)")
+
+    if args.dry_run:
+        print("Dry run - nothing written")
+        return 0
+
+    # Keep the rest of the history consistent with the lookup just applied
+    remap_history(lookup_dict)
+
+    written = write_encoded_partitions(days)
+    print(f"✓ Wrote {written} new or changed partition(s)")
+
+    rows = build_workbook()
+    print(f"✓ Rebuilt {template_path} ({rows} rows)")
+    print(f"⏱  Total {time.perf_counter() - started:.1f}s - run generate_template.py to refresh the Template sheets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
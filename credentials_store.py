@@ -8,14 +8,60 @@ TECHGIG_USERNAME = os.getenv('TECHGIG_USERNAME', 'your_username_here')
 TECHGIG_PASSWORD = os.getenv('TECHGIG_PASSWORD', 'your_password_here')
 
 # ================= TECHGIG URLS =================
-LOGIN_URL = "https://www.techgig.com/mis/link.php"
-STATS_URL = "https://www.techgig.com/mis/mis_tg_reg_stats.php"
+# Overridable so the scraper can be pointed at a local stand-in (see benchmarks/mis_stub.py)
+LOGIN_URL = os.getenv('TECHGIG_LOGIN_URL', "https://www.techgig.com/mis/link.php")
+STATS_URL = os.getenv('TECHGIG_STATS_URL', "https://www.techgig.com/mis/mis_tg_reg_stats.php")
 
 # ================= SETTINGS =================
 OUTPUT_DIR = "exports"
 HEADLESS = os.getenv('HEADLESS', 'True').lower() == 'true'  # Default to headless
 NAV_TIMEOUT_MS = int(os.getenv('NAV_TIMEOUT_MS', '60000'))  # 60 seconds default
 
+# ================= REQUEST FILTERING =================
+# Lightweight page profile: the scraper only needs the HTML, CSS, first-party
+# scripts and the CSV download, so everything else is aborted at the router.
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'true').lower() == 'true'
+# Stylesheets are NOT blocked by default: the MIS hides its .loading/.spinner/
+# .overlay elements with CSS, and without it those stay visible (slow waits,
+# blocked clicks). Add 'stylesheet' here only after checking against the live site.
+BLOCKED_RESOURCE_TYPES = set(filter(None, os.getenv(
+    'BLOCKED_RESOURCE_TYPES', 'image,media,font,beacon,texttrack,manifest'
+).split(',')))
+# Analytics / ad / tracking hosts (subdomains included)
+BLOCKED_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com', 'doubleclick.net',
+    'googlesyndication.com', 'adservice.google.com', 'facebook.net', 'facebook.com', 'connect.facebook.net',
+    'hotjar.com', 'clarity.ms', 'scorecardresearch.com', 'quantserve.com', 'taboola.com', 'outbrain.com',
+    'criteo.com', 'amazon-adsystem.com', 'moatads.com', 'newrelic.com', 'nr-data.net', 'notifyvisitors.com',
+    'onesignal.com', 'izooto.com', 'webengage.com', 'clevertap.com', 'mixpanel.com', 'segment.io',
+]
+# Hosts (besides the login/stats hosts) that login, search and download may load from
+ALLOWED_DOMAINS = [d for d in os.getenv(
+    'ALLOWED_DOMAINS', 'techgig.com,code.jquery.com,ajax.googleapis.com,cdnjs.cloudflare.com,cdn.jsdelivr.net'
+).split(',') if d]
+
+# ================= RECORD / REPLAY =================
+# live   - talk to the real MIS (default)
+# record - live run that also saves a HAR archive, the downloaded CSV and the run date
+# replay - serve the recorded HAR through Playwright routing: no network, no CAPTCHA
+SCRAPER_MODE = os.getenv('SCRAPER_MODE', 'live').lower()
+RECORDING_DIR = os.getenv('SCRAPER_RECORDING_DIR', os.path.join('recordings', 'latest'))
+
+
+def require_live_data(entry_point):
+    """
+    Refuse to run a pipeline that stores the scrape as yesterday's history while replaying
+
+    A replayed download holds the recorded day's data, but data_processor.py
+    stamps whatever it finds with yesterday's date. Replay is only for
+    techgig_scraper.py on its own and the benchmarks.
+    """
+    if SCRAPER_MODE == 'replay':
+        raise RuntimeError(
+            f"SCRAPER_MODE=replay is not allowed for {entry_point}: the recorded export would be "
+            f"saved to history/ as yesterday's data. Unset SCRAPER_MODE (or use live/record)."
+        )
+
 # ================= VALIDATION =================
 if TECHGIG_USERNAME == 'your_username_here' or TECHGIG_PASSWORD == 'your_password_here':
     if not os.getenv('GITHUB_ACTIONS'):
@@ -3,115 +3,219 @@ import os
 from datetime import datetime, timedelta
 from openpyxl import load_workbook
 
+from workbook_reader import read_sheet
+from history_store import (
+    DATE_FORMAT, fingerprint_rows, load_fingerprints, save_fingerprints,
+    list_partitions, load_history, write_partition, build_workbook, bootstrap_from_workbook,
+    workbook_is_current,
+    load_source_index, save_source_index, update_source_index,
+    sort_by_date, date_bounds, replace_day
+)
+from history_remap import remap_history
+from artifacts import write_artifact
+
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Construct file paths
 csv_path = os.path.join(script_dir, 'exports', 'Registered_User_Source_Summary.csv')
 lookup_path = os.path.join(script_dir, 'Source_TG_Latest.xlsx')
-output_path = os.path.join(script_dir, 'exports', 'Processed_User_Summary.xlsx')
+exports_dir = os.path.join(script_dir, 'exports')
+# Intermediate copy of the processed rows; format/retention set by ARTIFACT_* (see artifacts.py)
+artifact_name = 'Processed_User_Summary'
 template_path = os.path.join(script_dir, 'Registration_Template.xlsx')
 
-# Check if files exist
-if not os.path.exists(csv_path):
-    print(f"Error: CSV file not found at {csv_path}")
-    exit(1)
-
-if not os.path.exists(lookup_path):
-    print(f"Error: Lookup file not found at {lookup_path}")
-    exit(1)
+# Keep only the required columns
+columns_to_keep = ['Date', 'Registration Type', 'Registration Source', 'Campaign Source']
 
-# Read the CSV file with comma separator
-print("Reading CSV file...")
-df = pd.read_csv(csv_path)
 
-# Get yesterday's date in the format 15-01-2026
-yesterday = datetime.now() - timedelta(days=1)
-yesterday_str = yesterday.strftime('%d-%m-%Y')
+def load_lookup(lookup_path=lookup_path):
+    """
+    Read the Category sheet of the lookup file into a Registration Source -> New Source dict
 
-# Add Date column as the first column
-df.insert(0, 'Date', yesterday_str)
+    Independent of the scrape, so app.py warms it while the scraper runs.
+    """
+    if not os.path.exists(lookup_path):
+        raise FileNotFoundError(f"Lookup file not found at {lookup_path}")
 
-# Keep only the required columns
-columns_to_keep = ['Date', 'Registration Type', 'Registration Source', 'Campaign Source']
-df = df[columns_to_keep]
-
-# Read the lookup file (Category sheet)
-print("Reading lookup file...")
-lookup_df = pd.read_excel(lookup_path, sheet_name='Category')
-
-# Perform XLOOKUP equivalent
-print("Performing lookup...")
-
-# Column B (index 1) - Source (Dashboard) - this is the lookup array
-# Column C (index 2) - Actual Source - this is the return array
-lookup_col_b = lookup_df.columns[1]  # Column B - Source (Dashboard)
-lookup_col_c = lookup_df.columns[2]  # Column C - Actual Source
-
-# Create lookup dictionary
-lookup_dict = dict(zip(lookup_df[lookup_col_b], lookup_df[lookup_col_c]))
-
-# Apply lookup to create New Source column
-df['New Source'] = df['Registration Source'].map(lookup_dict)
-
-# Fill NaN values with empty string
-df['New Source'] = df['New Source'].fillna('')
-
-# Save to Excel file (intermediate file)
-print(f"Saving processed file to {output_path}...")
-df.to_excel(output_path, index=False, engine='openpyxl')
-
-# Now append to Registration_Template.xlsx with duplicate detection
-print(f"\nAppending data to {template_path}...")
-
-if os.path.exists(template_path):
-    # File exists, check for duplicates before appending
-    print("Template file exists. Checking for duplicates...")
-    
-    # Read existing data
-    existing_df = pd.read_excel(template_path, engine='openpyxl')
-    
-    # Check if data for this date already exists
-    existing_dates = existing_df['Date'].astype(str).unique() if 'Date' in existing_df.columns else []
-    
-    if yesterday_str in existing_dates:
-        print(f"⚠️  WARNING: Data for {yesterday_str} already exists in template!")
-        print(f"   Existing rows for this date: {len(existing_df[existing_df['Date'].astype(str) == yesterday_str])}")
-        print(f"   New rows to add: {len(df)}")
-        
-        # Remove existing data for this date
-        print(f"   Removing old data for {yesterday_str} and replacing with new data...")
-        existing_df = existing_df[existing_df['Date'].astype(str) != yesterday_str]
-        print(f"   ✓ Old data removed. Rows remaining: {len(existing_df)}")
-    
-    # Combine existing data with new data
-    combined_df = pd.concat([existing_df, df], ignore_index=True)
-    
-    # Sort by date (newest first)
+    # Read the lookup file (Category sheet)
+    print("Reading lookup file...")
+    # Column B (index 1) - Source (Dashboard) - this is the lookup array
+    # Column C (index 2) - Actual Source - this is the return array
+    # Only these two columns are streamed from the sheet
+    lookup_df = read_sheet(lookup_path, 'Category', columns=[1, 2])
+    lookup_col_b = lookup_df.columns[0]  # Column B - Source (Dashboard)
+    lookup_col_c = lookup_df.columns[1]  # Column C - Actual Source
+
+    # Create lookup dictionary
+    return dict(zip(lookup_df[lookup_col_b], lookup_df[lookup_col_c]))
+
+
+def prepare_export(csv_path, day, lookup_dict):
+    """
+    Read one MIS export, stamp it with its date, keep the needed columns and add New Source
+
+    Parameters:
+    csv_path (str): Path to a Registered_User_Source_Summary export
+    day (datetime): Date the export covers
+    lookup_dict (dict): Registration Source -> New Source, from load_lookup()
+    """
+    # Only the columns that are kept are parsed
+    df = pd.read_csv(csv_path, usecols=columns_to_keep[1:])
+
+    # Add Date column (a real date, not text) as the first column
+    df.insert(0, 'Date', pd.Timestamp(day).normalize())
+    df = df[columns_to_keep]
+
+    # Perform XLOOKUP equivalent; unmatched sources become ''
+    df['New Source'] = df['Registration Source'].map(lookup_dict).fillna('')
+    return df
+
+
+def ensure_history_partitions():
+    """One-time migration: split an existing Registration_Template.xlsx into history/ partitions."""
+    if list_partitions() or not os.path.exists(template_path):
+        return
+    print("No history partitions yet - migrating existing template data...")
+    written = bootstrap_from_workbook(template_path)
+    print(f"✓ Wrote {written} daily partition(s)")
+
+
+def load_existing_history():
+    """
+    Read the existing rows from the history/ partitions (None if there are none yet)
+
+    Independent of the scrape, so app.py loads it while the scraper runs.
+    """
+    ensure_history_partitions()
+    if not list_partitions():
+        return None
+
+    print("Reading existing history partitions...")
+    return load_history()
+
+
+def process_registrations(lookup_dict=None, existing_df=None):
+    """
+    Lookup yesterday's export, store it as a history partition and rebuild Registration_Template.xlsx
+
+    Parameters:
+    lookup_dict (dict): Pre-loaded lookup from load_lookup() (read from disk if None)
+    existing_df (DataFrame): Pre-loaded history from load_existing_history() (read from disk if None)
+
+    Returns:
+    tuple: (DataFrame of yesterday's processed rows, bool whether the template was rewritten,
+            DataFrame of the full history written to the template, or None when it was not rewritten)
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found at {csv_path}")
+
+    # Yesterday as a date; the 15-01-2026 text form is only used for file keys and messages
+    yesterday = pd.Timestamp(datetime.now() - timedelta(days=1)).normalize()
+    yesterday_str = yesterday.strftime(DATE_FORMAT)
+
+    if lookup_dict is None:
+        lookup_dict = load_lookup(lookup_path)
+
+    # Read the CSV and perform the XLOOKUP equivalent
+    print("Reading CSV file and performing lookup...")
+    df = prepare_export(csv_path, yesterday, lookup_dict)
+
+    # Optional intermediate file (nothing downstream reads it; off by default)
+    artifacts = write_artifact(df, exports_dir, artifact_name, yesterday)
+    for path in artifacts:
+        print(f"Saved processed file to {path}")
+
+    ensure_history_partitions()
+
+    # Bring older rows in line with any edits to the lookup (touches only affected days)
+    remapped_dates = remap_history(lookup_dict)
+    if remapped_dates:
+        existing_df = None  # prefetched history predates the remap
+
+    # Skip the rewrite entirely when yesterday's rows are identical to what's stored
+    new_fingerprint = fingerprint_rows(df)
+    fingerprints = load_fingerprints()
+    stored = fingerprints.get(yesterday_str)
+    data_changed = stored is None or stored['sha256'] != new_fingerprint
+
+    # Why the template is rebuilt when yesterday's data itself is unchanged
+    rebuild_reasons = []
+    if remapped_dates:
+        rebuild_reasons.append(f"{len(remapped_dates)} older day(s) were remapped")
+    if not os.path.exists(template_path):
+        rebuild_reasons.append(f"{os.path.basename(template_path)} is missing")
+    elif not (data_changed or remapped_dates) and not workbook_is_current(template_path, fingerprints):
+        # e.g. partitions and fingerprints pulled from CI on top of an old local build
+        rebuild_reasons.append(f"{os.path.basename(template_path)} was built from older history")
+
+    if not data_changed and not rebuild_reasons:
+        print(f"\n✓ Data for {yesterday_str} is unchanged ({len(df)} rows, fingerprint {new_fingerprint[:12]}).")
+        print(f"  Skipping rewrite of {template_path}")
+        return df, False, None
+
+    if existing_df is None:
+        existing_df = load_existing_history()
+
+    # Only this day's partition changes - that's all git has to store
+    if write_partition(df, yesterday_str):
+        print(f"✓ Wrote history partition for {yesterday_str}")
+    fingerprints[yesterday_str] = {'rows': len(df), 'sha256': new_fingerprint}
+    save_fingerprints(fingerprints)
+    sources = df['Registration Source'].fillna('').astype(str).unique()
+    save_source_index(update_source_index(load_source_index(), yesterday_str, sources))
+
+    # Now rebuild Registration_Template.xlsx from the history with duplicate detection
+    print(f"\nRebuilding {template_path}...")
+
+    if existing_df is not None:
+        # History exists, check for duplicates before appending
+        print("History exists. Checking for duplicates...")
+
+        # History is date-sorted, so this date's rows are one binary search away
+        existing_df = sort_by_date(existing_df)
+        lo, hi = date_bounds(existing_df, yesterday)
+
+        if not data_changed:
+            print(f"✓ Data for {yesterday_str} is unchanged - rebuilding because {' and '.join(rebuild_reasons)}")
+        elif hi > lo:
+            # The stored fingerprint differs, i.e. the data really changed
+            print(f"⚠️  WARNING: Data for {yesterday_str} changed since it was last ingested!")
+            print(f"   Existing rows for this date: {hi - lo}")
+            print(f"   New rows to add: {len(df)}")
+            print(f"   Replacing old data for {yesterday_str} with new data...")
+
+        # Drop any old rows for the date and splice the new ones in at their sorted position
+        combined_df = replace_day(existing_df, yesterday, df)
+
+        # Save combined data
+        build_workbook(template_path, history_df=combined_df)
+        print(f"✓ Appended {len(df)} rows")
+        print(f"✓ Total rows in template: {len(combined_df)}")
+
+    else:
+        # No history yet, create new file with current data
+        print("No history yet. Creating new template file...")
+        combined_df = df
+        build_workbook(template_path, history_df=combined_df)
+        print(f"✓ Created new template file with {len(df)} rows")
+
+    print("\n" + "="*60)
+    print("PROCESSING COMPLETE!")
+    print("="*60)
+    print(f"Date processed: {yesterday_str}")
+    print(f"Intermediate output: {', '.join(artifacts) or 'none (ARTIFACT_FORMAT=none)'}")
+    print(f"Final template: {template_path}")
+    print("\nFirst few rows of today's processed data:")
+    print(df.head())
+    print("="*60)
+
+    return df, True, combined_df
+
+
+if __name__ == "__main__":
     try:
-        combined_df['Date_Parsed'] = pd.to_datetime(combined_df['Date'], format='%d-%m-%Y', errors='coerce')
-        combined_df = combined_df.sort_values('Date_Parsed', ascending=False)
-        combined_df = combined_df.drop(columns=['Date_Parsed'])
-    except:
-        print("   Note: Could not sort by date, keeping insertion order")
-    
-    # Save combined data
-    combined_df.to_excel(template_path, index=False, engine='openpyxl')
-    print(f"✓ Appended {len(df)} rows")
-    print(f"✓ Total rows in template: {len(combined_df)}")
-    
-else:
-    # File doesn't exist, create new file with current data
-    print("Template file doesn't exist. Creating new file...")
-    df.to_excel(template_path, index=False, engine='openpyxl')
-    print(f"✓ Created new template file with {len(df)} rows")
-
-print("\n" + "="*60)
-print("PROCESSING COMPLETE!")
-print("="*60)
-print(f"Date processed: {yesterday_str}")
-print(f"Intermediate output: {output_path}")
-print(f"Final template: {template_path}")
-print("\nFirst few rows of today's processed data:")
-print(df.head())
-print("="*60)
\ No newline at end of file
+        process_registrations()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        exit(1)
@@ -4,167 +4,251 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from datetime import datetime, timedelta
 import os
 
+from history_store import DATE_FORMAT, history_columns, sheet_order, to_dates, compute_fingerprints, load_fingerprints
+from workbook_reader import read_sheet
+
+# ================= ROLLUP CONFIGURATION =================
+# Dimensions aggregated (together with Date) in the single grouped pass
+CUBE_DIMENSIONS = ['New Source', 'Registration Type', 'Campaign Source']
+
+# dimension -> (sheet name, header of the label column)
+ROLLUP_SHEETS = {
+    'New Source': ('Template', 'Source'),
+    'Registration Type': ('By Registration Type', 'Registration Type'),
+    'Campaign Source': ('By Campaign Source', 'Campaign Source'),
+}
+
+# Rows always shown (in this order) even when they have no registrations
+REQUIRED_LABELS = {
+    'New Source': ['content.techgig.com', 'Organic', 'Delivery', 'Social Media'],
+}
+
+TOTAL_LABEL = 'Total of Registration'
+HEADER_FILL = 'F4B084'  # Orange header row
+TOTAL_FILL = '90EE90'   # Light green total row
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+
+def build_cube(df):
+    """
+    Count registrations per Date × New Source × Registration Type × Campaign Source
+
+    Missing values are kept as their own group so totals still include them.
+    Groups keep first-appearance order, which is the row order of the sheets.
+    """
+    return df.groupby(['Date'] + CUBE_DIMENSIONS, sort=False, dropna=False).size()
+
+
+def render_rollup(cube, dimension, date_range, label_header, required_labels=()):
+    """
+    Build a Template-style table (one row per value, one column per date, Total) from the cube
+
+    Zero counts are shown as '-'; a 'Total of Registration' row is appended.
+    """
+    by_label = cube.groupby(level=['Date', dimension], sort=False, dropna=False).sum()
+    per_day = by_label.unstack('Date', fill_value=0)
+    totals = per_day.sum(axis=1)
+    per_day = per_day.reindex(columns=date_range, fill_value=0)
+    
+    # Required labels first, then any others in order of appearance (blank labels skipped)
+    labels = list(required_labels)
+    for label in per_day.index:
+        if label not in labels and pd.notna(label):
+            labels.append(label)
+    per_day = per_day.reindex(labels, fill_value=0)
+    totals = totals.reindex(labels, fill_value=0)
+    
+    date_columns = [date.strftime('%m-%d-%Y') for date in date_range]
+    result_df = per_day.astype(object).where(per_day > 0, '-')
+    result_df.columns = date_columns
+    result_df.insert(0, label_header, labels)
+    result_df['Total'] = totals.astype(int).values
+    
+    # Add "Total of Registration" row (all registrations, including blank labels)
+    day_totals = by_label.groupby(level='Date', dropna=False).sum()
+    total_row = {label_header: TOTAL_LABEL, 'Total': int(by_label.sum())}
+    for date, date_str in zip(date_range, date_columns):
+        count = int(day_totals.get(date, 0))
+        total_row[date_str] = count if count > 0 else '-'
+    
+    result_df = pd.concat([result_df, pd.DataFrame([total_row])], ignore_index=True)
+    return result_df[[label_header] + date_columns + ['Total']]
+
+
+def write_rollup_sheet(wb, sheet_name, result_df):
+    """(Re)create a formatted sheet in the workbook from a rendered rollup table."""
+    # Remove the sheet if it already exists
+    if sheet_name in wb.sheetnames:
+        del wb[sheet_name]
+    
+    ws = wb.create_sheet(sheet_name)
+    
+    # Write headers
+    headers = result_df.columns.tolist()
+    for col_idx, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col_idx, value=header)
+        cell.font = Font(bold=True, size=11)
+        cell.fill = PatternFill(start_color=HEADER_FILL, end_color=HEADER_FILL, fill_type="solid")
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = THIN_BORDER
+    
+    # Write data rows
+    for row_idx, row_data in enumerate(result_df.values, 2):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            
+            # Format "Total of Registration" row
+            if row_data[0] == TOTAL_LABEL:
+                cell.font = Font(bold=True, size=11)
+                cell.fill = PatternFill(start_color=TOTAL_FILL, end_color=TOTAL_FILL, fill_type="solid")
+            
+            # Align first column (labels) to left, others to center
+            if col_idx == 1:
+                cell.alignment = Alignment(horizontal='left', vertical='center')
+            else:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+            
+            cell.border = THIN_BORDER
+    
+    # Adjust column widths
+    ws.column_dimensions['A'].width = 25  # Label column
+    for col_idx in range(2, len(headers) + 1):
+        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = 12
+    
+    return ws
+
+
+def build_rollups(input_file, history_df=None):
+    """
+    Read the raw data and render every rollup table (the in-memory pivot)
+
+    Parameters:
+    input_file (str): Path to the input Excel file (Registration_Template.xlsx)
+    history_df (DataFrame): History already in memory, e.g. from process_registrations()
+                            (the raw sheet of input_file is read if None)
+
+    Returns:
+    tuple: ({sheet name: rendered DataFrame}, summary dict for reporting)
+    """
+    if history_df is not None:
+        # Same rows that were just written to the raw sheet - no need to read them back.
+        # Put them in sheet order, which fixes the row order of the rollups, and
+        # blank labels as missing, which is how empty cells read back.
+        df = sheet_order(history_df[history_columns]).reset_index(drop=True)
+        df[CUBE_DIMENSIONS] = df[CUBE_DIMENSIONS].mask(df[CUBE_DIMENSIONS] == '')
+    else:
+        # Read the input data (read-only stream of the raw sheet, history columns only)
+        df = read_sheet(input_file, 0, columns=history_columns).copy()
+    # Date cells are real dates; text dates from older workbooks are parsed once here
+    df['Date'] = to_dates(df['Date'])
+    
+    # Verify each date against the fingerprint recorded when it was ingested
+    print("\n[FINGERPRINT CHECK] Verifying per-date content hashes...")
+    fingerprints_path = os.path.join(os.path.dirname(os.path.abspath(input_file)), 'history', 'fingerprints.json')
+    stored = load_fingerprints(fingerprints_path)
+    current = compute_fingerprints(df)
+    
+    changed_dates = [d for d, fp in current.items() if d in stored and stored[d]['sha256'] != fp['sha256']]
+    unrecorded_dates = [d for d in current if d not in stored]
+    
+    if changed_dates:
+        print(f"⚠️  WARNING: Data changed since ingest for {len(changed_dates)} date(s):")
+        for date in changed_dates:
+            print(f"   - {date}: {stored[date]['rows']} rows at ingest, {current[date]['rows']} rows now")
+    else:
+        print(f"✓ All {len(current) - len(unrecorded_dates)} fingerprinted date(s) match - data is clean!")
+    
+    if unrecorded_dates:
+        print(f"   Note: {len(unrecorded_dates)} date(s) have no recorded fingerprint yet")
+    
+    # Get min and max dates
+    min_date = df['Date'].min()
+    max_date = df['Date'].max()
+    
+    print(f"\n[DATE RANGE] Processing data from {min_date.strftime(DATE_FORMAT)} to {max_date.strftime(DATE_FORMAT)}")
+    print(f"[DATE RANGE] Total unique dates: {df['Date'].nunique()}")
+    print(f"[DATE RANGE] Total rows: {len(df)}")
+    
+    # Generate all dates in the range
+    date_range = pd.date_range(start=min_date, end=max_date, freq='D')
+    
+    # One grouped pass over the raw rows; every sheet below is rendered from it
+    cube = build_cube(df)
+    print(f"[CUBE] {len(cube)} cells over Date × {' × '.join(CUBE_DIMENSIONS)}")
+    
+    rollups = {}
+    for dimension, (sheet_name, label_header) in ROLLUP_SHEETS.items():
+        rollups[sheet_name] = render_rollup(cube, dimension, date_range, label_header,
+                                            required_labels=REQUIRED_LABELS.get(dimension, []))
+    
+    summary = {
+        'min_date': min_date,
+        'max_date': max_date,
+        'registrations': len(df),
+        'unique_dates': df['Date'].nunique(),
+    }
+    return rollups, summary
+
+
+def save_rollup_sheets(input_file, rollups):
+    """Write the rendered rollup tables into the workbook (overwrites the original file)."""
+    # Load the existing workbook
+    wb = load_workbook(input_file)
+    for sheet_name, result_df in rollups.items():
+        write_rollup_sheet(wb, sheet_name, result_df)
+    wb.save(input_file)
+    return input_file
+
+
+def rollup_cells(result_df):
+    """
+    A rendered rollup as (text, bold, fill) rows - what write_rollup_sheet puts in the sheet
+
+    Same shape as workbook_reader.read_sheet_cells(), so the email image can be
+    drawn straight from the pivot without reading the saved workbook back.
+    """
+    rows = [[(str(header), True, '00' + HEADER_FILL) for header in result_df.columns]]
+    for row_data in result_df.values:
+        is_total = row_data[0] == TOTAL_LABEL
+        fill = '00' + TOTAL_FILL if is_total else None
+        rows.append([('' if value is None else str(value), is_total, fill) for value in row_data])
+    return rows
+
+
+def print_summary(input_file, rollups, summary):
+    print("\n" + "="*60)
+    print("TEMPLATE GENERATION COMPLETE!")
+    print("="*60)
+    print(f"✓ Template sheets created: {input_file}")
+    for sheet_name, result_df in rollups.items():
+        print(f"   - {sheet_name}: {len(result_df) - 1} rows")
+    print(f"✓ Date range: {summary['min_date'].strftime('%m-%d-%Y')} to {summary['max_date'].strftime('%m-%d-%Y')}")
+    print(f"✓ Total sources: {len(rollups['Template']) - 1}")
+    print(f"✓ Total registrations: {summary['registrations']}")
+    print(f"✓ Unique dates processed: {summary['unique_dates']}")
+    print("="*60)
+
+
 def generate_excel_template(input_file):
     """
-    Generate formatted Excel template from registration data and add as new sheet
+    Generate formatted Excel template sheets from registration data
+
+    Writes the "Template" sheet (New Source × date) plus one sheet per extra
+    dimension in ROLLUP_SHEETS, all rendered from a single aggregation cube.
     
     Parameters:
     input_file (str): Path to the input Excel file (Registration_Template.xlsx)
     """
     
     try:
-        # Read the input data
-        df = pd.read_excel(input_file)
-        
-        # Check for duplicate dates
-        print("\n[DUPLICATE CHECK] Analyzing data for duplicate dates...")
-        df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y', errors='coerce')
-        
-        # Count rows per date
-        date_counts = df['Date'].value_counts().sort_index(ascending=False)
-        
-        # Check for duplicates
-        duplicate_dates = date_counts[date_counts > 1]
-        if len(duplicate_dates) > 0:
-            print(f"⚠️  WARNING: Found duplicate data for {len(duplicate_dates)} date(s):")
-            for date, count in duplicate_dates.items():
-                print(f"   - {date.strftime('%d-%m-%Y')}: {count} entries")
-            
-            print("\n[DEDUPLICATION] This shouldn't happen with the updated data_processor.py")
-            print("                If you see this, the duplicate detection in data_processor.py may need attention.")
-        else:
-            print("✓ No duplicate dates found - data is clean!")
-        
-        # Get min and max dates
-        min_date = df['Date'].min()
-        max_date = df['Date'].max()
-        
-        print(f"\n[DATE RANGE] Processing data from {min_date.strftime('%d-%m-%Y')} to {max_date.strftime('%d-%m-%Y')}")
-        print(f"[DATE RANGE] Total unique dates: {df['Date'].nunique()}")
-        print(f"[DATE RANGE] Total rows: {len(df)}")
-        
-        # Generate all dates in the range
-        date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-        
-        # Define the required source categories in specific order
-        required_sources = ['content.techgig.com', 'Organic', 'Delivery', 'Social Media']
-        
-        # Get all unique sources from data
-        unique_sources = df['New Source'].unique().tolist()
-        
-        # Combine required sources with any additional sources found in data
-        all_sources = required_sources.copy()
-        for source in unique_sources:
-            if source not in all_sources and pd.notna(source):
-                all_sources.append(source)
-        
-        # Create output data structure
-        output_data = []
-        
-        # Process each source
-        for source in all_sources:
-            row = {'Source': source}
-            
-            # Count registrations for each date
-            for date in date_range:
-                date_str = date.strftime('%m-%d-%Y')
-                
-                # Filter data for this source and date
-                count = len(df[(df['New Source'] == source) & (df['Date'] == date)])
-                
-                # Add to row (use '-' for zero counts)
-                row[date_str] = count if count > 0 else '-'
-            
-            # Calculate total for this source
-            total = len(df[df['New Source'] == source])
-            row['Total'] = total
-            
-            output_data.append(row)
-        
-        # Add "Total of Registration" row
-        total_row = {'Source': 'Total of Registration'}
-        for date in date_range:
-            date_str = date.strftime('%m-%d-%Y')
-            count = len(df[df['Date'] == date])
-            total_row[date_str] = count if count > 0 else '-'
-        
-        # Overall total
-        total_row['Total'] = len(df)
-        output_data.append(total_row)
-        
-        # Create DataFrame
-        result_df = pd.DataFrame(output_data)
-        
-        # Reorder columns: Source, dates in order, Total
-        date_columns = [date.strftime('%m-%d-%Y') for date in date_range]
-        column_order = ['Source'] + date_columns + ['Total']
-        result_df = result_df[column_order]
-        
-        # Load the existing workbook
-        wb = load_workbook(input_file)
-        
-        # Remove "Template" sheet if it already exists
-        if "Template" in wb.sheetnames:
-            del wb["Template"]
-        
-        # Create new "Template" sheet
-        ws = wb.create_sheet("Template")
-        
-        # Write headers
-        headers = result_df.columns.tolist()
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = Font(bold=True, size=11)
-            cell.fill = PatternFill(start_color="F4B084", end_color="F4B084", fill_type="solid")
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-        
-        # Write data rows
-        for row_idx, row_data in enumerate(result_df.values, 2):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                
-                # Format "Total of Registration" row
-                if row_data[0] == 'Total of Registration':
-                    cell.font = Font(bold=True, size=11)
-                    cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")  # Light green
-                
-                # Align first column (Source) to left, others to center
-                if col_idx == 1:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-                else:
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 25  # Source column
-        for col_idx in range(2, len(headers) + 1):
-            ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = 12
-        
-        # Save the workbook (overwrites the original file)
-        wb.save(input_file)
-        
-        print("\n" + "="*60)
-        print("TEMPLATE GENERATION COMPLETE!")
-        print("="*60)
-        print(f"✓ Template sheet created: {input_file}")
-        print(f"✓ Date range: {min_date.strftime('%m-%d-%Y')} to {max_date.strftime('%m-%d-%Y')}")
-        print(f"✓ Total sources: {len(all_sources)}")
-        print(f"✓ Total registrations: {len(df)}")
-        print(f"✓ Unique dates processed: {df['Date'].nunique()}")
-        print("="*60)
-        
+        rollups, summary = build_rollups(input_file)
+        save_rollup_sheets(input_file, rollups)
+        print_summary(input_file, rollups, summary)
         return input_file
         
     except FileNotFoundError:
@@ -7,15 +7,16 @@ from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
 
 import pandas as pd
-import openpyxl
-from openpyxl.styles import PatternFill
 from PIL import Image, ImageDraw, ImageFont
 
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
+from workbook_reader import read_sheet_cells
+
 
 # =========================
 # CONFIGURATION
@@ -30,6 +31,10 @@ SHEET_NAME = "Template"
 # Gmail API scope
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Optional override of the Gmail API root (e.g. benchmarks/gmail_stub.py).
+# When set, no OAuth is performed and credentials.json is not required.
+GMAIL_API_ENDPOINT = os.getenv('GMAIL_API_ENDPOINT')
+
 
 # =========================
 # CROSS-PLATFORM EXCEL TO IMAGE (IMPROVED)
@@ -52,19 +57,30 @@ def excel_to_image_cross_platform(excel_path, sheet_name):
     """
     print(f"📂 Opening Excel file: {excel_path}")
     
-    # Load workbook
-    wb = openpyxl.load_workbook(excel_path, data_only=True)
+    # Stream only the requested sheet (read-only), not the raw-data sheet
+    sheet_title, cells = read_sheet_cells(excel_path, sheet_name)
     
-    try:
-        ws = wb[sheet_name]
+    if sheet_title == sheet_name:
         print(f"✅ Opened sheet: '{sheet_name}'")
-    except KeyError:
+    else:
         print(f"⚠️ Sheet '{sheet_name}' not found. Using first sheet.")
-        ws = wb.active
     
+    img = render_table_image(cells)
+    print(f"✅ Excel sheet '{sheet_name}' converted to image successfully")
+    
+    return img
+
+
+def render_table_image(cells):
+    """
+    Draw a table of (text, bold, fill ARGB or None) cells as a PNG-ready image
+
+    Used for both a sheet read back from the workbook and the in-memory pivot
+    (generate_template.rollup_cells), which produce the same image.
+    """
     # Get used range
-    max_row = ws.max_row
-    max_col = ws.max_column
+    max_row = len(cells)
+    max_col = len(cells[0]) if cells else 0
     
     print(f"📊 Processing {max_row} rows × {max_col} columns")
     
@@ -72,27 +88,22 @@ def excel_to_image_cross_platform(excel_path, sheet_name):
     data = []
     styles = []
     
-    for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=max_row, max_col=max_col), 1):
+    for row in cells:
         row_data = []
         row_styles = []
         
-        for col_idx, cell in enumerate(row, 1):
-            # Get cell value
-            value = str(cell.value) if cell.value is not None else ''
+        for value, bold, fill in row:
             row_data.append(value)
             
             # Get cell style
             cell_style = {
-                'bold': cell.font.bold if cell.font else False,
+                'bold': bold,
                 'bg_color': (255, 255, 255)  # Default white background
             }
             
             # Get background color
-            if cell.fill and cell.fill.start_color:
-                if hasattr(cell.fill.start_color, 'rgb'):
-                    rgb_value = cell.fill.start_color.rgb
-                    if rgb_value and rgb_value != '00000000':
-                        cell_style['bg_color'] = hex_to_rgb(rgb_value)
+            if fill and fill != '00000000':
+                cell_style['bg_color'] = hex_to_rgb(fill)
             
             row_styles.append(cell_style)
         
@@ -182,9 +193,6 @@ def excel_to_image_cross_platform(excel_path, sheet_name):
         
         y_offset += cell_height
     
-    wb.close()
-    print(f"✅ Excel sheet '{sheet_name}' converted to image successfully")
-    
     return img
 
 
@@ -193,6 +201,15 @@ def excel_to_image_cross_platform(excel_path, sheet_name):
 # =========================
 def authenticate_gmail():
     """Authenticate with Gmail API using OAuth 2.0"""
+    if GMAIL_API_ENDPOINT:
+        print(f"🧪 Using Gmail API endpoint override: {GMAIL_API_ENDPOINT}")
+        return build(
+            'gmail', 'v1',
+            credentials=AnonymousCredentials(),
+            client_options={'api_endpoint': GMAIL_API_ENDPOINT},
+            static_discovery=True
+        )
+
     creds = None
     
     if os.path.exists('token.pickle'):
@@ -245,6 +262,27 @@ def create_message_with_attachment(sender, to, subject, body_text, img):
     return {'raw': raw_message}
 
 
+def build_report_message(cells, recipient=None, subject=EMAIL_SUBJECT, body=EMAIL_BODY):
+    """
+    Render the Template table and wrap it in a ready-to-send Gmail message
+
+    Parameters:
+    cells (list): Table rows of (text, bold, fill) tuples
+    recipient (str): Defaults to RECIPIENT_EMAIL
+    """
+    recipient = recipient or RECIPIENT_EMAIL
+    img = render_table_image(cells)
+    message = create_message_with_attachment(
+        sender=SENDER_EMAIL,
+        to=recipient,
+        subject=subject,
+        body_text=body,
+        img=img
+    )
+    print(f"✅ Email message built for {recipient} ({img.width}x{img.height} image)")
+    return message
+
+
 def send_email(service, message):
     """Send email using Gmail API"""
     try:
@@ -263,9 +301,15 @@ def send_email(service, message):
 def send_registration_template_via_gmail(
     recipient=None,
     subject=EMAIL_SUBJECT,
-    body=EMAIL_BODY
+    body=EMAIL_BODY,
+    service=None
 ):
-    """Main function to send Registration Template via Gmail"""
+    """
+    Main function to send Registration Template via Gmail
+
+    service: an already authenticated Gmail service (see authenticate_gmail());
+    app.py authenticates while the scraper runs and passes it in here.
+    """
     print("\n📧 Starting Gmail automation...\n")
     
     recipient = recipient or RECIPIENT_EMAIL
@@ -273,7 +317,7 @@ def send_registration_template_via_gmail(
     excel_path = os.path.join(script_dir, EXCEL_FILENAME)
     
     credentials_path = os.path.join(script_dir, 'credentials.json')
-    if not os.path.exists(credentials_path):
+    if service is None and not GMAIL_API_ENDPOINT and not os.path.exists(credentials_path):
         raise FileNotFoundError(
             f"❌ credentials.json not found!\n"
             f"   Please download it from Google Cloud Console"
@@ -290,7 +334,10 @@ def send_registration_template_via_gmail(
     
     # Step 2: Authenticate with Gmail
     print("\nSTEP 2: Authenticating with Gmail API...")
-    service = authenticate_gmail()
+    if service is None:
+        service = authenticate_gmail()
+    else:
+        print("✅ Using pre-authenticated Gmail service")
     
     # Step 3: Create email message
     print("\nSTEP 3: Creating email message...")
@@ -0,0 +1,212 @@
+"""
+REGISTRATION HISTORY QUERY
+==========================
+Answers ad-hoc questions like "how many Delivery registrations last March"
+straight from the history/ partitions, without opening the xlsx.
+
+- Counts come from a date-sorted index of precomputed daily aggregates
+  (Date × New Source × Registration Type × Campaign Source). The index is
+  cached in history/.query_index.pkl and only the days whose fingerprint
+  changed are re-aggregated.
+- --rows reads only the partitions inside the requested date range.
+
+Dates use data_processor.py's 'dd-mm-YYYY' format; 'New Source' is the
+looked-up source stored at ingest.
+
+Usage:
+    python history_query.py --month 03-2026 --source Delivery
+    python history_query.py --from 01-02-2026 --to 14-02-2026 --group-by source
+    python history_query.py --from 01-02-2026 --type Google --campaign google --group-by date
+    python history_query.py --from 14-02-2026 --to 14-02-2026 --source Organic --rows
+"""
+
+import argparse
+import bisect
+import calendar
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from history_store import (
+    DATE_FORMAT, history_dir, fingerprints_path,
+    list_partitions, partition_date, read_partition, load_fingerprints, format_dates
+)
+from generate_template import CUBE_DIMENSIONS, build_cube
+
+# ================= CONFIGURATION =================
+index_path = os.path.join(history_dir, '.query_index.pkl')
+
+# CLI filter / group-by name -> history column
+FIELDS = {
+    'source': 'New Source',
+    'type': 'Registration Type',
+    'campaign': 'Campaign Source',
+}
+
+
+# ================= INDEX =================
+class HistoryIndex:
+    """Date-sorted partition list plus per-day aggregate counts."""
+
+    def __init__(self, history_dir=history_dir, fingerprints_path=fingerprints_path, index_path=index_path):
+        self.history_dir = history_dir
+        self.fingerprints_path = fingerprints_path
+        self.index_path = index_path
+
+        # list_partitions() is sorted by file name, i.e. by date
+        self.partitions = list_partitions(history_dir)
+        self.dates = [partition_date(p) for p in self.partitions]
+        self.daily = self._load_daily_aggregates()
+
+    def _partition_keys(self):
+        """Content key per partition: its ingest fingerprint, or mtime when it has none."""
+        fingerprints = load_fingerprints(self.fingerprints_path)
+        keys = {}
+        for path, day in zip(self.partitions, self.dates):
+            entry = fingerprints.get(day.strftime(DATE_FORMAT))
+            keys[day] = entry['sha256'] if entry else f"mtime:{os.stat(path).st_mtime_ns}"
+        return keys
+
+    def _load_daily_aggregates(self):
+        keys = self._partition_keys()
+
+        cached_keys, daily = {}, None
+        if os.path.exists(self.index_path):
+            try:
+                cached = pd.read_pickle(self.index_path)
+                cached_keys, daily = cached['keys'], cached['daily']
+            except Exception:
+                cached_keys, daily = {}, None
+
+        stale = [day for day, key in keys.items() if cached_keys.get(day) != key]
+        removed = [day for day in cached_keys if day not in keys]
+        if daily is not None and not stale and not removed:
+            return daily
+
+        # Re-aggregate only the days that are new or changed
+        frames = []
+        if daily is not None:
+            frames.append(daily[~daily['Date'].isin(stale + removed)])
+        paths = dict(zip(self.dates, self.partitions))
+        if stale:
+            rows = pd.concat([read_partition(paths[day]) for day in stale], ignore_index=True)
+            frames.append(build_cube(rows).rename('Registrations').reset_index())
+
+        daily = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['Date'] + CUBE_DIMENSIONS + ['Registrations'])
+        daily = daily.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+        try:
+            pd.to_pickle({'keys': keys, 'daily': daily}, self.index_path)
+        except OSError:
+            pass
+        return daily
+
+    def date_slice(self, start=None, end=None):
+        """Positions [lo, hi) of partitions within [start, end] via binary search."""
+        lo = bisect.bisect_left(self.dates, start) if start else 0
+        hi = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return lo, hi
+
+    def counts(self, start=None, end=None, filters=None, group_by=None):
+        """Registration counts from the daily aggregates (a Series when grouped, else an int)."""
+        daily = self.daily
+        dates = daily['Date'].values
+        lo = dates.searchsorted(pd.Timestamp(start).to_datetime64(), 'left') if start else 0
+        hi = dates.searchsorted(pd.Timestamp(end).to_datetime64(), 'right') if end else len(daily)
+        selected = _apply_filters(daily.iloc[lo:hi], filters)
+
+        if not group_by:
+            return int(selected['Registrations'].sum())
+        if group_by == 'date':
+            grouped = selected.groupby('Date')['Registrations'].sum()
+            grouped.index = grouped.index.strftime(DATE_FORMAT)
+            return grouped
+        grouped = selected.groupby(FIELDS[group_by])['Registrations'].sum()
+        return grouped.sort_values(ascending=False)
+
+    def rows(self, start=None, end=None, filters=None):
+        """Matching raw rows, reading only the partitions inside the date range."""
+        lo, hi = self.date_slice(start, end)
+        if lo == hi:
+            return pd.DataFrame()
+        frames = [read_partition(path) for path in reversed(self.partitions[lo:hi])]
+        return _apply_filters(pd.concat(frames, ignore_index=True), filters)
+
+
+def _apply_filters(df, filters):
+    for column, values in (filters or {}).items():
+        if values:
+            wanted = {v.lower() for v in values}
+            df = df[df[column].astype(str).str.lower().isin(wanted)]
+    return df
+
+
+# ================= CLI =================
+def _parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT)
+
+
+def _month_range(value):
+    month = datetime.strptime(value, '%m-%Y')
+    last_day = calendar.monthrange(month.year, month.month)[1]
+    return month, month.replace(day=last_day)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the registration history")
+    parser.add_argument('--from', dest='start', type=_parse_date, help="First date (dd-mm-YYYY)")
+    parser.add_argument('--to', dest='end', type=_parse_date, help="Last date (dd-mm-YYYY)")
+    parser.add_argument('--month', type=_month_range, help="Whole month (MM-YYYY); overrides --from/--to")
+    parser.add_argument('--source', action='append', help="New Source (repeatable)")
+    parser.add_argument('--type', action='append', help="Registration Type (repeatable)")
+    parser.add_argument('--campaign', action='append', help="Campaign Source (repeatable)")
+    parser.add_argument('--group-by', choices=['date'] + list(FIELDS), help="Break the count down")
+    parser.add_argument('--rows', action='store_true', help="Print matching rows instead of counts")
+    parser.add_argument('--output', help="With --rows, write CSV to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    start, end = args.month if args.month else (args.start, args.end)
+    filters = {
+        'New Source': args.source,
+        'Registration Type': args.type,
+        'Campaign Source': args.campaign,
+    }
+
+    started = time.perf_counter()
+    index = HistoryIndex()
+    if not index.partitions:
+        print(f"✗ Error: No history partitions found in {history_dir}")
+        return 1
+
+    span = f"{(start or index.dates[0]).strftime(DATE_FORMAT)} to {(end or index.dates[-1]).strftime(DATE_FORMAT)}"
+    active = ', '.join(f"{k}={'/'.join(v)}" for k, v in filters.items() if v) or 'none'
+
+    if args.rows:
+        rows = index.rows(start, end, filters)
+        if not rows.empty:
+            rows = rows.assign(Date=format_dates(rows['Date']))
+        if args.output:
+            rows.to_csv(args.output, index=False)
+            print(f"✓ {len(rows)} row(s) written to {args.output}")
+        else:
+            rows.to_csv(sys.stdout, index=False)
+        return 0
+
+    result = index.counts(start, end, filters, args.group_by)
+    print(f"[QUERY] {span} | filters: {active}")
+    if args.group_by:
+        for label, count in result.items():
+            print(f"   {str(label) or '(blank)':<30} {count:>8}")
+        print(f"   {'Total':<30} {int(result.sum()):>8}")
+    else:
+        print(f"   Registrations: {result}")
+    print(f"[QUERY] Answered in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
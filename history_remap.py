@@ -0,0 +1,143 @@
+"""
+INCREMENTAL HISTORY REMAPPING
+=============================
+'New Source' is assigned at ingest from the Category sheet of
+Source_TG_Latest.xlsx. When that sheet is edited, this module brings the
+stored history in line without reprocessing everything:
+
+1. Diff the lookup the history was mapped with (history/lookup_snapshot.json)
+   against the current one -> the Registration Source keys that changed.
+2. Use history/source_index.json (Registration Source -> dates) to find the
+   only partitions containing those keys.
+3. Rewrite just those rows, and refresh those days' fingerprints (which in
+   turn refreshes their daily aggregates in history_query.py).
+
+Cost is proportional to what changed, not to the size of the history.
+data_processor.py runs this automatically on every ingest.
+
+Usage:
+    python history_remap.py             # remap + rebuild Registration_Template.xlsx if needed
+    python history_remap.py --dry-run   # show changed sources and affected days only
+"""
+
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from history_store import (
+    history_dir, partition_path, read_partition, write_partition,
+    fingerprint_rows, load_fingerprints, save_fingerprints, load_source_index, date_key
+)
+
+# ================= CONFIGURATION =================
+snapshot_path = os.path.join(history_dir, 'lookup_snapshot.json')
+
+
+def lookup_snapshot(lookup_dict):
+    """Lookup as {Registration Source: New Source}, in the text form stored in partitions."""
+    return {
+        str(source): '' if pd.isna(new_source) else str(new_source)
+        for source, new_source in lookup_dict.items()
+        if pd.notna(source)
+    }
+
+
+def load_snapshot(path=snapshot_path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(snapshot, path=snapshot_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+
+def diff_lookups(old, new):
+    """Registration Sources whose New Source differs (a missing key maps to '')."""
+    return sorted(key for key in set(old) | set(new) if old.get(key, '') != new.get(key, ''))
+
+
+def affected_dates(changed_sources, index):
+    """{date: set of changed sources on that date}, from the inverted index."""
+    affected = {}
+    for source in changed_sources:
+        for date_str in index.get(source, []):
+            affected.setdefault(date_str, set()).add(source)
+    return affected
+
+
+def remap_history(lookup_dict, dry_run=False):
+    """
+    Re-map stored history rows whose lookup entry changed
+
+    Returns the list of dates whose partitions were rewritten.
+    """
+    new_snapshot = lookup_snapshot(lookup_dict)
+    old_snapshot = load_snapshot()
+
+    if old_snapshot is None:
+        # Nothing to diff against yet: the history is taken as mapped with today's lookup
+        if not dry_run:
+            save_snapshot(new_snapshot)
+            print("✓ Recorded lookup snapshot for future remapping")
+        return []
+
+    changed = diff_lookups(old_snapshot, new_snapshot)
+    if not changed:
+        return []
+
+    affected = affected_dates(changed, load_source_index())
+    print(f"\n[REMAP] Lookup changed for {len(changed)} Registration Source(s); {len(affected)} day(s) affected")
+    for source in changed:
+        print(f"   - {source}: '{old_snapshot.get(source, '')}' -> '{new_snapshot.get(source, '')}'")
+
+    if dry_run:
+        for date_str in sorted(affected, key=date_key):
+            print(f"   {date_str}: {', '.join(sorted(affected[date_str]))}")
+        return []
+
+    fingerprints = load_fingerprints()
+    rewritten = []
+    rows_remapped = 0
+    for date_str in sorted(affected, key=date_key):
+        path = partition_path(date_str)
+        if not os.path.exists(path):
+            continue
+
+        day_df = read_partition(path)
+        mask = day_df['Registration Source'].isin(affected[date_str])
+        before = day_df['New Source'].fillna('').astype(str)
+        day_df.loc[mask, 'New Source'] = day_df.loc[mask, 'Registration Source'].map(new_snapshot).fillna('')
+        # Only rows whose New Source really moved (a day can be affected yet end up unchanged)
+        rows_remapped += int((day_df['New Source'].fillna('').astype(str) != before).sum())
+
+        if write_partition(day_df, date_str):
+            rewritten.append(date_str)
+            fingerprints[date_str] = {'rows': len(day_df), 'sha256': fingerprint_rows(day_df)}
+
+    save_fingerprints(fingerprints)
+    save_snapshot(new_snapshot)
+    print(f"✓ Remapped {rows_remapped} row(s) across {len(rewritten)} partition(s)")
+    return rewritten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-map history after Source_TG_Latest.xlsx changes")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+    args = parser.parse_args()
+
+    from data_processor import load_lookup
+    from history_store import build_workbook, template_path
+
+    rewritten = remap_history(load_lookup(), dry_run=args.dry_run)
+    if rewritten:
+        rows = build_workbook()
+        print(f"✓ Rebuilt {template_path} ({rows} rows) - run generate_template.py to refresh the Template sheets")
+    elif not args.dry_run:
+        print("✓ History already matches the current lookup")
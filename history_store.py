@@ -0,0 +1,418 @@
+"""
+PARTITIONED REGISTRATION HISTORY
+================================
+The registration history is stored as one small, deterministic CSV per day:
+
+    history/
+    ├── fingerprints.json          # per-date row count + content hash
+    ├── source_index.json          # Registration Source -> dates it appears on
+    ├── lookup_snapshot.json       # lookup the history is currently mapped with
+    └── 2026/
+        └── 02/
+            ├── 2026-02-13.csv
+            └── 2026-02-14.csv
+
+Rows inside a partition are sorted, so re-writing a day with the same data
+produces a byte-identical file and git only ever sees the new day's partition.
+Registration_Template.xlsx is a build artifact rebuilt from these files. It
+records a digest of fingerprints.json in its document properties, so a
+workbook left over from older history is detected and rebuilt.
+
+In memory, Date is a real datetime64 column and history frames are kept
+sorted by it (oldest first), so finding a day or a date range is a binary
+search. Dates become 'dd-mm-YYYY' text only at the edges: partition files,
+fingerprints, the source index and the xlsx number format.
+
+Usage:
+    python history_store.py                # rebuild Registration_Template.xlsx from history/
+    python history_store.py --bootstrap    # split an existing Registration_Template.xlsx into history/
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from openpyxl.packaging.custom import StringProperty
+
+from workbook_reader import custom_property, read_sheet
+
+# ================= CONFIGURATION =================
+script_dir = os.path.dirname(os.path.abspath(__file__))
+history_dir = os.path.join(script_dir, 'history')
+fingerprints_path = os.path.join(history_dir, 'fingerprints.json')
+source_index_path = os.path.join(history_dir, 'source_index.json')
+template_path = os.path.join(script_dir, 'Registration_Template.xlsx')
+
+DATE_FORMAT = '%d-%m-%Y'
+# Custom document property of Registration_Template.xlsx holding history_digest()
+DIGEST_PROPERTY = 'HistoryDigest'
+history_columns = ['Date', 'Registration Type', 'Registration Source', 'Campaign Source', 'New Source']
+
+
+# ================= DATES =================
+def to_dates(values):
+    """
+    Parse a Date column into datetime64 (day precision)
+
+    Accepts 'dd-mm-YYYY' text, real dates (xlsx cells) or a mix of both -
+    cells edited by hand in Excel can come back as datetimes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    values = pd.Series(values)
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    leftover = parsed.isna() & values.notna()
+    if leftover.any():
+        parsed[leftover] = pd.to_datetime(values[leftover], errors='coerce')
+    return parsed.dt.normalize()
+
+
+def format_dates(values):
+    """Render a Date column as 'dd-mm-YYYY' text (output edge only)."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime(DATE_FORMAT)
+    return values.astype(str)
+
+
+def sort_by_date(df):
+    """Oldest first; stable, so rows keep their order within a day."""
+    if df['Date'].is_monotonic_increasing:
+        return df
+    return df.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+def sheet_order(df):
+    """Newest first, as the raw sheet of Registration_Template.xlsx stores rows (stable within a day)."""
+    return df.sort_values('Date', ascending=False, kind='mergesort')
+
+
+def date_bounds(df, start, end=None):
+    """
+    Positions [lo, hi) of the rows dated start..end in a date-sorted frame
+
+    Parameters:
+    df (DataFrame): History sorted by Date (see sort_by_date)
+    start (datetime): First day
+    end (datetime): Last day (defaults to start, i.e. a single day)
+    """
+    dates = df['Date'].values
+    lo = dates.searchsorted(pd.Timestamp(start).to_datetime64(), 'left')
+    hi = dates.searchsorted(pd.Timestamp(end if end is not None else start).to_datetime64(), 'right')
+    return int(lo), int(hi)
+
+
+def replace_day(df, day, day_df):
+    """Swap one day's rows in a date-sorted frame (insert when absent); stays sorted."""
+    lo, hi = date_bounds(df, day)
+    return pd.concat([df.iloc[:lo], day_df, df.iloc[hi:]], ignore_index=True)
+
+
+# ================= PER-DATE FINGERPRINTS =================
+def _canonical_lines(df):
+    """
+    One text line per row, sorted, so the fingerprint doesn't depend on row order
+
+    Values are normalised (NaN -> '', everything as text) so rows read back from
+    a partition or the xlsx hash the same as freshly processed rows. Lines start
+    with the Date, so sorting also groups them by date.
+    """
+    canonical = df[history_columns].reset_index(drop=True)
+    canonical = canonical.assign(Date=format_dates(canonical['Date'])).fillna('').astype(str)
+    lines = canonical[history_columns[0]]
+    for column in history_columns[1:]:
+        lines = lines + '\x1f' + canonical[column]
+    return lines.sort_values(kind='mergesort')
+
+
+def _hash_lines(lines):
+    return hashlib.sha256(('\n'.join(lines) + '\n').encode('utf-8')).hexdigest()
+
+
+def fingerprint_rows(df):
+    """Content hash of a set of history rows, independent of row order."""
+    return _hash_lines(_canonical_lines(df).tolist())
+
+
+def compute_fingerprints(df):
+    """Return {date: {'rows': n, 'sha256': hash}} for every date in df."""
+    lines = _canonical_lines(df)
+    dates = format_dates(df['Date']).reset_index(drop=True).loc[lines.index]
+    return {
+        date: {'rows': len(group), 'sha256': _hash_lines(group.tolist())}
+        for date, group in lines.groupby(dates, sort=False)
+    }
+
+
+def load_fingerprints(path=fingerprints_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_fingerprints(fingerprints, path=fingerprints_path):
+    # Sorted keys keep the file stable so git only sees real changes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def history_digest(fingerprints):
+    """One hash over every per-date fingerprint - changes whenever any day's rows do."""
+    return hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# ================= PARTITIONS =================
+def partition_path(date_str, history_dir=history_dir):
+    """history/YYYY/MM/YYYY-MM-DD.csv for a 'dd-mm-YYYY' date string."""
+    day = datetime.strptime(date_str, DATE_FORMAT)
+    return os.path.join(history_dir, day.strftime('%Y'), day.strftime('%m'), day.strftime('%Y-%m-%d') + '.csv')
+
+
+def partition_date(path):
+    """Day a partition holds, from its YYYY-MM-DD.csv file name."""
+    return pd.Timestamp(datetime.strptime(os.path.basename(path)[:-4], '%Y-%m-%d'))
+
+
+def list_partitions(history_dir=history_dir):
+    """All partition files, oldest first (file names sort chronologically)."""
+    paths = glob.glob(os.path.join(history_dir, '[0-9]' * 4, '[0-9]' * 2, '*.csv'))
+    return sorted(paths, key=os.path.basename)
+
+
+def partition_bytes(day_df):
+    """The exact bytes write_partition() stores for one day's rows."""
+    rows = day_df[history_columns]
+    rows = rows.assign(Date=format_dates(rows['Date'])).fillna('').astype(str)
+    rows = rows.sort_values(history_columns, kind='mergesort')
+    return rows.to_csv(index=False, lineterminator='\n').encode('utf-8')
+
+
+def write_partition(day_df, date_str, history_dir=history_dir):
+    """
+    Write one day's rows as a sorted CSV partition
+
+    Returns True when the file was created or its content changed.
+    """
+    return write_partition_bytes(partition_bytes(day_df), date_str, history_dir)
+
+
+def write_partition_bytes(payload, date_str, history_dir=history_dir):
+    """Store pre-encoded partition bytes (see partition_bytes); True when the file changed."""
+    path = partition_path(date_str, history_dir)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return True
+
+
+def read_partition(path):
+    """One day's rows; Date comes from the file name, so no per-row date parsing."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df['Date'] = partition_date(path)
+    return df
+
+
+def load_history(history_dir=history_dir):
+    """Concatenate every partition into one DataFrame, oldest date first (None if empty)."""
+    paths = list_partitions(history_dir)
+    if not paths:
+        return None
+    # list_partitions() is in date order, so the result is already date-sorted
+    return pd.concat([read_partition(path) for path in paths], ignore_index=True)
+
+
+def write_partitions(df, history_dir=history_dir, fingerprints_path=fingerprints_path):
+    """Split a multi-day DataFrame into partitions and record their fingerprints and sources."""
+    index_path = os.path.join(history_dir, 'source_index.json')
+    index = load_source_index(index_path, history_dir)
+
+    df = df.assign(Date=to_dates(df['Date']))
+    written = 0
+    day_sources = {}
+    for day, day_df in df.groupby('Date', sort=False):
+        date_str = day.strftime(DATE_FORMAT)
+        written += write_partition(day_df, date_str, history_dir)
+        day_sources[date_str] = day_df['Registration Source'].fillna('').astype(str).unique()
+
+    fingerprints = load_fingerprints(fingerprints_path)
+    fingerprints.update(compute_fingerprints(df))
+    save_fingerprints(fingerprints, fingerprints_path)
+    save_source_index(update_source_index_many(index, day_sources), index_path)
+    return written
+
+
+def write_encoded_partitions(days, history_dir=history_dir, fingerprints_path=fingerprints_path):
+    """
+    Store days that were already encoded elsewhere (e.g. in bulk_ingest.py workers)
+
+    Parameters:
+    days (list): dicts with 'date' ('dd-mm-YYYY'), 'payload' (partition_bytes),
+                 'rows', 'sha256' (fingerprint_rows) and 'sources'
+
+    Only file writes and index merges happen here; fingerprints and the
+    source index are saved once.
+    """
+    index_path = os.path.join(history_dir, 'source_index.json')
+    index = load_source_index(index_path, history_dir)
+    fingerprints = load_fingerprints(fingerprints_path)
+
+    written = 0
+    for day in days:
+        written += write_partition_bytes(day['payload'], day['date'], history_dir)
+        fingerprints[day['date']] = {'rows': day['rows'], 'sha256': day['sha256']}
+
+    save_fingerprints(fingerprints, fingerprints_path)
+    save_source_index(update_source_index_many(index, {day['date']: day['sources'] for day in days}), index_path)
+    return written
+
+
+# ================= SOURCE INDEX =================
+# Inverted index Registration Source -> dates, so a lookup change only
+# touches the partitions that actually contain the changed sources.
+def date_key(date_str):
+    return datetime.strptime(date_str, DATE_FORMAT)
+
+
+def build_source_index(history_dir=history_dir):
+    """Full scan of the partitions (only needed when source_index.json is missing)."""
+    index = {}
+    for path in list_partitions(history_dir):
+        day_df = read_partition(path)
+        if day_df.empty:
+            continue
+        date_str = partition_date(path).strftime(DATE_FORMAT)
+        for source in day_df['Registration Source'].unique():
+            index.setdefault(source, []).append(date_str)
+    return index
+
+
+def load_source_index(path=source_index_path, history_dir=history_dir):
+    if not os.path.exists(path):
+        index = build_source_index(history_dir)
+        save_source_index(index, path)
+        return index
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_source_index(index, path=source_index_path):
+    # One source per line, dates in order: a new day only touches the lines of its sources
+    lines = [
+        f"  {json.dumps(source, ensure_ascii=False)}: {json.dumps(sorted(set(dates), key=date_key))}"
+        for source, dates in sorted(index.items()) if dates
+    ]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n' + ',\n'.join(lines) + '\n}\n')
+
+
+def update_source_index_many(index, day_sources):
+    """update_source_index() for many dates at once ({date_str: sources}), in one pass over the index."""
+    dates = set(day_sources)
+    for source in list(index):
+        remaining = [d for d in index[source] if d not in dates]
+        if len(remaining) != len(index[source]):
+            if remaining:
+                index[source] = remaining
+            else:
+                del index[source]
+    for date_str, sources in day_sources.items():
+        for source in sources:
+            index.setdefault(str(source), []).append(date_str)
+    return index
+
+
+def update_source_index(index, date_str, sources):
+    """Record that date_str now contains exactly these Registration Sources."""
+    for source in list(index):
+        if date_str in index[source]:
+            index[source] = [d for d in index[source] if d != date_str]
+            if not index[source]:
+                del index[source]
+    for source in sources:
+        index.setdefault(str(source), []).append(date_str)
+    return index
+
+
+# ================= WORKBOOK =================
+def write_history_xlsx(df, path, digest=None):
+    """
+    Write history rows to an xlsx; Date cells are real dates shown as dd-mm-yyyy
+
+    Parameters:
+    df (DataFrame): History rows in the order they should appear
+    path (str): Output workbook
+    digest (str): history_digest() the rows were built from, stored as a document property
+    """
+    with pd.ExcelWriter(path, engine='openpyxl', date_format='DD-MM-YYYY', datetime_format='DD-MM-YYYY') as writer:
+        df.to_excel(writer, index=False)
+        if digest:
+            writer.book.custom_doc_props.append(StringProperty(name=DIGEST_PROPERTY, value=digest))
+
+
+def workbook_is_current(template_path=template_path, fingerprints=None, fingerprints_path=fingerprints_path):
+    """
+    Whether Registration_Template.xlsx was built from the history as it is now
+
+    False when the workbook is missing, predates the digest property, or was
+    built before fingerprints.json last changed (e.g. partitions pulled from CI).
+    """
+    if not os.path.exists(template_path):
+        return False
+    if fingerprints is None:
+        fingerprints = load_fingerprints(fingerprints_path)
+    return custom_property(template_path, DIGEST_PROPERTY) == history_digest(fingerprints)
+
+
+def build_workbook(template_path=template_path, history_dir=history_dir, history_df=None):
+    """
+    Rebuild the raw data sheet of Registration_Template.xlsx from the partitions
+
+    Rows are written newest date first. The Template sheet is added afterwards
+    by generate_template.py. Callers save fingerprints.json before rebuilding,
+    so the digest stamped on the workbook matches the rows in it.
+    """
+    if history_df is None:
+        history_df = load_history(history_dir)
+    if history_df is None:
+        raise FileNotFoundError(f"No history partitions found in {history_dir}")
+
+    history_df = history_df.assign(Date=to_dates(history_df['Date']))
+    digest = history_digest(load_fingerprints(os.path.join(history_dir, 'fingerprints.json')))
+    write_history_xlsx(sheet_order(history_df), template_path, digest)
+    return len(history_df)
+
+
+def bootstrap_from_workbook(template_path=template_path, history_dir=history_dir,
+                            fingerprints_path=fingerprints_path):
+    """One-time migration: split an existing Registration_Template.xlsx into partitions."""
+    df = read_sheet(template_path, 0, columns=history_columns)
+    df = df.assign(Date=to_dates(df['Date']))
+    written = write_partitions(df, history_dir, fingerprints_path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the partitioned registration history")
+    parser.add_argument('--bootstrap', action='store_true',
+                        help="Split the existing Registration_Template.xlsx into history/ partitions")
+    args = parser.parse_args()
+
+    if args.bootstrap:
+        count = bootstrap_from_workbook()
+        print(f"✓ Wrote {count} partition(s) to {history_dir}")
+    else:
+        rows = build_workbook()
+        print(f"✓ Rebuilt {template_path} from {len(list_partitions())} partition(s) ({rows} rows)")
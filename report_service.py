@@ -0,0 +1,364 @@
+"""
+REPORT SERVICE (DAEMON MODE)
+============================
+Long-running alternative to `python app.py` that keeps the expensive parts
+of the pipeline warm between runs:
+
+- one Chromium browser + logged-in MIS session (Playwright)
+- the compiled source lookup (Source_TG_Latest.xlsx, re-read only when it changes)
+- an authorized Gmail API client
+- pandas / openpyxl already imported
+
+Reports run on a built-in daily schedule and on demand over a local HTTP
+endpoint. Before each run (and periodically while idle) the service
+health-checks the browser and MIS session and rebuilds whatever went stale.
+
+Endpoints (bound to 127.0.0.1):
+    POST /run            queue a report run (add ?wait=1 to block until it finishes)
+    GET  /health         JSON status: browser, session, last run, next scheduled run
+                         (503 when the report worker has died)
+
+Usage:
+    python report_service.py                        # schedule at REPORT_TIME (default 07:30)
+    python report_service.py --at 06:00 --port 8787
+    python report_service.py --no-schedule          # on-demand only
+    curl -X POST "http://127.0.0.1:8787/run?wait=1"
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from playwright.sync_api import sync_playwright
+
+import app
+import credentials_store as cs
+import data_processor
+import gmail_sender
+import techgig_scraper
+
+# ================= CONFIGURATION =================
+REPORT_TIME = os.getenv('REPORT_TIME', '07:30')                       # daily run, local time (HH:MM)
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8787'))
+HEALTH_CHECK_INTERVAL_S = int(os.getenv('HEALTH_CHECK_INTERVAL_S', '900'))  # idle session check
+
+
+class ReportService:
+    """
+    Owns the warm resources and runs reports one at a time
+
+    All Playwright calls happen on the worker thread (the sync API is bound to
+    the thread that started it); the scheduler and HTTP threads only queue jobs.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.stop_event = threading.Event()
+        self._submit_lock = threading.Lock()
+        self.worker_error = None
+
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.logged_in = False
+        self.gmail_service = None
+
+        self.status = {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'running': False,
+            'runs': 0,
+            'last_run': None,
+            'last_error': None,
+            'next_scheduled': None,
+        }
+
+    # ----------------- warm resources -----------------
+    def _browser_healthy(self):
+        return (
+            self.browser is not None
+            and self.browser.is_connected()
+            and self.page is not None
+            and not self.page.is_closed()
+        )
+
+    def _close_browser(self):
+        for resource in (self.context, self.browser):
+            try:
+                if resource is not None:
+                    resource.close()
+            except Exception:
+                pass
+        self.browser = self.context = self.page = None
+        self.logged_in = False
+
+    def ensure_browser(self):
+        if self._browser_healthy():
+            return
+        if self.browser is not None:
+            print("⚠️  Browser is stale - relaunching...")
+        self._close_browser()
+        self.browser, self.context, self.page = techgig_scraper.open_browser(self._playwright)
+        print("✅ Browser ready")
+
+    def ensure_session(self):
+        """Make sure the MIS session is authenticated, logging in again if it expired."""
+        self.ensure_browser()
+        if self.logged_in and techgig_scraper.is_logged_in(self.page):
+            return
+        print("🔐 Logging in to TechGig MIS...")
+        techgig_scraper.login(self.page)
+        self.logged_in = True
+
+    def ensure_gmail(self):
+        if self.gmail_service is None:
+            self.gmail_service = gmail_sender.authenticate_gmail()
+        return self.gmail_service
+
+    def warm_up(self):
+        print("\n[WARM-UP] Preparing browser, lookup and Gmail client...")
+        techgig_scraper.ensure_dirs()
+        self.ensure_session()
+        data_processor.load_lookup()
+        self.ensure_gmail()
+        print("[WARM-UP] Done\n")
+
+    def health_check(self):
+        try:
+            self.ensure_session()
+        except Exception as e:
+            print(f"⚠️  Health check failed: {e} - will rebuild on next run")
+            self._close_browser()
+
+    # ----------------- report run -----------------
+    def run_report(self):
+        """Same stages as app.py, but with the warm browser, lookup and Gmail client."""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # History and lookup don't need the scrape; load them while it runs
+            history = pool.submit(data_processor.load_existing_history)
+            lookup = pool.submit(data_processor.load_lookup)
+
+            techgig_scraper.traffic.reset()
+            self.ensure_session()
+            try:
+                techgig_scraper.download_yesterday_report(self.page)
+            except Exception:
+                # Session may have silently expired mid-run: rebuild once and retry
+                print("⚠️  Scrape failed - rebuilding browser session and retrying...")
+                self._close_browser()
+                self.ensure_session()
+                techgig_scraper.download_yesterday_report(self.page)
+            techgig_scraper.traffic.report()
+
+            results = {'lookup': lookup.result(), 'history': history.result()}
+
+        results['process'] = app.process_stage(results)
+        results['gmail_auth'] = self.ensure_gmail()
+        try:
+            app.output_stage(results)
+        except Exception:
+            # Drop the client so the next run re-authenticates
+            self.gmail_service = None
+            raise
+
+        return time.perf_counter() - started
+
+    def _execute(self, job):
+        self.status['running'] = True
+        try:
+            elapsed = self.run_report()
+            job['result'] = {'ok': True, 'seconds': round(elapsed, 1)}
+            print(f"\n🎉 Report run ({job['trigger']}) finished in {elapsed:.1f}s\n")
+        except Exception as e:
+            traceback.print_exc()
+            job['result'] = {'ok': False, 'error': str(e)}
+            self.status['last_error'] = str(e)
+            print(f"\n❌ Report run ({job['trigger']}) failed: {e}\n")
+        finally:
+            self.status['running'] = False
+            self.status['runs'] += 1
+            self.status['last_run'] = {
+                'trigger': job['trigger'],
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                **job['result'],
+            }
+            job['done'].set()
+
+    @staticmethod
+    def _fail_job(job, error):
+        job['result'] = {'ok': False, 'error': error}
+        job['done'].set()
+
+    def submit(self, trigger):
+        job = {'trigger': trigger, 'done': threading.Event(), 'result': None}
+        with self._submit_lock:
+            if self.worker_error:
+                # Nobody would ever pick it up
+                self._fail_job(job, self.worker_error)
+            else:
+                self.jobs.put(job)
+        return job
+
+    def _worker_died(self, error):
+        """Record why the worker stopped and fail every queued (and future) job."""
+        print(f"❌ Report worker stopped: {error}")
+        with self._submit_lock:
+            self.worker_error = error
+            self.status['last_error'] = error
+            while True:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    self._fail_job(job, error)
+
+    def worker(self):
+        """Owns Playwright: runs queued jobs and idle health checks."""
+        try:
+            self._playwright = sync_playwright().start()
+        except Exception as e:
+            traceback.print_exc()
+            self._worker_died(f"Playwright failed to start: {e}")
+            return
+
+        try:
+            try:
+                self.warm_up()
+            except Exception as e:
+                print(f"⚠️  Warm-up incomplete: {e}")
+
+            while not self.stop_event.is_set():
+                try:
+                    job = self.jobs.get(timeout=HEALTH_CHECK_INTERVAL_S)
+                except queue.Empty:
+                    self.health_check()
+                    continue
+                if job is None:
+                    break
+                self._execute(job)
+        except Exception as e:
+            traceback.print_exc()
+            self._worker_died(f"Report worker crashed: {e}")
+        finally:
+            self._close_browser()
+            self._playwright.stop()
+
+    # ----------------- schedule -----------------
+    def scheduler(self, at):
+        hour, minute = (int(part) for part in at.split(':'))
+        while not self.stop_event.is_set():
+            now = datetime.now()
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            self.status['next_scheduled'] = next_run.isoformat(timespec='minutes')
+
+            if self.stop_event.wait((next_run - now).total_seconds()):
+                break
+            self.submit('schedule')
+
+    def stop(self):
+        self.stop_event.set()
+        self.jobs.put(None)
+
+
+def make_handler(service):
+    """HTTP handler bound to a ReportService instance."""
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path != '/health':
+                self._send_json(404, {'error': 'not found'})
+                return
+            payload = dict(service.status)
+            payload['browser_connected'] = bool(service.browser and service.browser.is_connected())
+            payload['logged_in'] = service.logged_in
+            payload['gmail_ready'] = service.gmail_service is not None
+            payload['queued'] = service.jobs.qsize()
+            payload['worker_error'] = service.worker_error
+            self._send_json(503 if service.worker_error else 200, payload)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/run':
+                self._send_json(404, {'error': 'not found'})
+                return
+            job = service.submit('http')
+            if parse_qs(url.query).get('wait', ['0'])[0] in ('1', 'true'):
+                job['done'].wait()
+                self._send_json(200 if job['result']['ok'] else 500, job['result'])
+            else:
+                self._send_json(202, {'queued': True, 'position': service.jobs.qsize()})
+
+    return ServiceHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the registration report as a warm background service")
+    parser.add_argument('--at', default=REPORT_TIME, help="Daily run time HH:MM (local time)")
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help="Local HTTP port")
+    parser.add_argument('--no-schedule', action='store_true', help="Only run when triggered over HTTP")
+    parser.add_argument('--run-now', action='store_true', help="Queue one run immediately after start-up")
+    args = parser.parse_args()
+
+    try:
+        cs.require_live_data('report_service.py')
+    except RuntimeError as e:
+        print(f"✗ Error: {e}")
+        return 1
+
+    # Relative paths (exports/, token.pickle, techgig_scraper.py) resolve from the repo root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    service = ReportService()
+    worker = threading.Thread(target=service.worker, name='report-worker')
+    worker.start()
+
+    if not args.no_schedule:
+        threading.Thread(target=service.scheduler, args=(args.at,), daemon=True, name='scheduler').start()
+    if args.run_now:
+        service.submit('startup')
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(service))
+    print("="*60)
+    print("REGISTRATION REPORT SERVICE")
+    print("="*60)
+    print(f"🌐 Listening on http://127.0.0.1:{args.port}  (POST /run, GET /health)")
+    if not args.no_schedule:
+        print(f"⏰ Daily run at {args.at}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        service.stop()
+        worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
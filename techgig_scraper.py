@@ -1,5 +1,9 @@
+import json
 import os
+import shutil
+import time
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import credentials_store as cs
@@ -215,38 +219,245 @@ def click_third_row_total_and_download(page) -> str:
     return path
 
 
+def is_logged_in(page) -> bool:
+    """Open the stats page and report whether the session is still authenticated."""
+    page.goto(cs.STATS_URL, wait_until="domcontentloaded")
+    ensure_not_captcha(page)
+    return page.locator("#start_day").count() > 0
+
+
+# ================= REQUEST FILTERING =================
+def _host_matches(host: str, domains) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def block_reason(resource_type: str, url: str):
+    """
+    Why a request should be aborted, or None to let it through
+
+    Parameters:
+    resource_type (str): Playwright resource type ('document', 'script', 'image', ...)
+    url (str): Request URL
+    """
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        return None                      # data:, blob: etc. never hit the network
+    if _host_matches(host, cs.BLOCKED_DOMAINS):
+        return "tracker"
+    if resource_type in cs.BLOCKED_RESOURCE_TYPES:
+        return resource_type
+    first_party = {urlparse(cs.LOGIN_URL).hostname, urlparse(cs.STATS_URL).hostname}
+    if host not in first_party and not _host_matches(host, cs.ALLOWED_DOMAINS):
+        return "third-party"
+    return None
+
+
+class TrafficStats:
+    """Per-page request / byte counters (keyed on the main frame's URL path)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pages = {}
+        self.current = "(start)"
+
+    def _bucket(self):
+        return self.pages.setdefault(self.current, {'requests': 0, 'bytes': 0, 'failed': 0, 'blocked': 0})
+
+    def on_navigated(self, frame):
+        if frame.parent_frame is None:
+            self.current = urlparse(frame.url).path or "/"
+
+    def on_finished(self, request):
+        bucket = self._bucket()
+        bucket['requests'] += 1
+        try:
+            sizes = request.sizes()
+            bucket['bytes'] += sizes['responseHeadersSize'] + max(sizes['responseBodySize'], 0)
+        except Exception:
+            pass
+
+    def on_failed(self, request):
+        self._bucket()['failed'] += 1
+
+    def on_blocked(self, request):
+        self._bucket()['blocked'] += 1
+
+    def report(self):
+        if not self.pages:
+            return
+        print("\n[TRAFFIC] Per-page network usage:")
+        for path, c in self.pages.items():
+            print(f"   {path:<40} {c['requests']:>4} req  {c['bytes'] / 1024:>8.1f} KB  "
+                  f"{c['blocked']:>4} blocked  {c['failed']:>3} failed")
+        total_bytes = sum(c['bytes'] for c in self.pages.values())
+        total_requests = sum(c['requests'] for c in self.pages.values())
+        total_blocked = sum(c['blocked'] for c in self.pages.values())
+        print(f"   {'Total':<40} {total_requests:>4} req  {total_bytes / 1024:>8.1f} KB  {total_blocked:>4} blocked")
+
+
+# Counters for the current process; report_service.py resets them per run
+traffic = TrafficStats()
+
+
+def install_request_filter(context, stats=traffic):
+    """Abort non-essential requests on every page of the context and count the rest."""
+    def handle(route):
+        request = route.request
+        # A blocked route also fails the request; count it once, as blocked
+        reason = block_reason(request.resource_type, request.url) if cs.BLOCK_RESOURCES else None
+        if reason:
+            stats.on_blocked(request)
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()             # on to the HAR router in replay mode, else the network
+
+    if cs.BLOCK_RESOURCES:
+        context.route("**/*", handle)
+    context.on("requestfinished", stats.on_finished)
+    context.on("requestfailed", lambda request: None if request.failure == "net::ERR_BLOCKED_BY_CLIENT"
+               else stats.on_failed(request))
+    context.on("page", lambda page: page.on("framenavigated", stats.on_navigated))
+
+
+# ================= RECORD / REPLAY =================
+# A recording is a directory holding:
+#   session.har                         - every request/response of the run (contains credentials!)
+#   Registered_User_Source_Summary.csv  - the file the live run downloaded
+#   session.json                        - run date and metadata
+# Replaying POSTs (login, search) must match the recording byte for byte, so
+# replay needs the same credentials and the recorded run date.
+#
+#   SCRAPER_MODE=record python techgig_scraper.py    # capture recordings/latest/
+#   SCRAPER_MODE=replay python techgig_scraper.py    # offline, deterministic re-run
+def recording_paths(recording_dir=None):
+    recording_dir = recording_dir or cs.RECORDING_DIR
+    return {
+        'dir': recording_dir,
+        'har': os.path.join(recording_dir, 'session.har'),
+        'session': os.path.join(recording_dir, 'session.json'),
+    }
+
+
+def check_recording():
+    """Fail early with a clear message when replay has no recording to replay."""
+    paths = recording_paths()
+    for path in (paths['har'], paths['session']):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recording at {path} - run with SCRAPER_MODE=record first")
+
+
+def run_date() -> datetime:
+    """'Today' for the scrape: the recorded date when replaying, else the real date."""
+    if cs.SCRAPER_MODE != 'replay':
+        return datetime.today()
+    with open(recording_paths()['session'], 'r', encoding='utf-8') as f:
+        return datetime.strptime(json.load(f)['run_date'], '%Y-%m-%d')
+
+
+def save_recording(report_path, today):
+    """Keep the downloaded CSV and run metadata next to the HAR of a record run."""
+    paths = recording_paths()
+    shutil.copy(report_path, os.path.join(paths['dir'], os.path.basename(report_path)))
+    session = {
+        'run_date': today.strftime('%Y-%m-%d'),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'login_url': cs.LOGIN_URL,
+        'stats_url': cs.STATS_URL,
+        'report_file': os.path.basename(report_path),
+    }
+    with open(paths['session'], 'w', encoding='utf-8') as f:
+        json.dump(session, f, indent=2)
+        f.write('\n')
+    print(f"[RECORD] Session saved to {paths['dir']} (HAR is written when the browser closes)")
+
+
+def verify_replay(report_path):
+    """Compare a replayed download with the file captured during recording."""
+    with open(recording_paths()['session'], 'r', encoding='utf-8') as f:
+        expected_path = os.path.join(cs.RECORDING_DIR, json.load(f)['report_file'])
+    with open(report_path, 'rb') as got, open(expected_path, 'rb') as expected:
+        if got.read() != expected.read():
+            raise RuntimeError(f"Replayed download {report_path} differs from recorded {expected_path}")
+    print("[REPLAY] ✓ Download matches the recording")
+
+
+def _context_options():
+    options = {'accept_downloads': True}
+    if cs.SCRAPER_MODE == 'record':
+        paths = recording_paths()
+        os.makedirs(paths['dir'], exist_ok=True)
+        options.update(record_har_path=paths['har'], record_har_content='embed')
+    return options
+
+
+def open_browser(p):
+    """Launch Chromium and return (browser, context, page) configured for the MIS."""
+    if cs.SCRAPER_MODE not in ('live', 'record', 'replay'):
+        raise ValueError(f"SCRAPER_MODE must be live, record or replay (got {cs.SCRAPER_MODE!r})")
+
+    browser = p.chromium.launch(headless=cs.HEADLESS)
+    context = browser.new_context(**_context_options())
+    if cs.SCRAPER_MODE == 'replay':
+        har = recording_paths()['har']
+        # Anything not in the archive fails instead of reaching the live site
+        context.route_from_har(har, not_found='abort')
+        print(f"[REPLAY] Serving MIS pages from {har}")
+    # Registered last so it runs first: blocked requests never reach the HAR router
+    install_request_filter(context)
+    page = context.new_page()
+    page.set_default_timeout(cs.NAV_TIMEOUT_MS)
+    return browser, context, page
+
+
+def download_yesterday_report(page, today=None) -> str:
+    """Search the 7-day window ending today and download yesterday's export."""
+    today = today or run_date()
+    yesterday = today - timedelta(days=1)
+
+    print("\n" + "="*60)
+    print("DOWNLOADING YESTERDAY'S REGISTRATION REPORT")
+    print("="*60)
+    
+    # Set date range to include yesterday
+    # 7-day window to ensure we have enough rows in the table
+    start_date = yesterday - timedelta(days=6)
+    set_date_range_and_search(page, start_date, today)
+    
+    # Click on the 3rd row's total and download
+    report_path = click_third_row_total_and_download(page)
+    print("✅ Downloaded (yesterday's data):", report_path)
+    return report_path
+
+
 def main():
     ensure_dirs()
 
-    today = datetime.today()
-    yesterday = today - timedelta(days=1)
+    started = time.perf_counter()
+    if cs.SCRAPER_MODE == 'replay':
+        check_recording()
+    today = run_date()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=cs.HEADLESS)
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
-        page.set_default_timeout(cs.NAV_TIMEOUT_MS)
+        browser, context, page = open_browser(p)
 
         login(page)
+        report_path = download_yesterday_report(page, today)
+        traffic.report()
 
-        print("\n" + "="*60)
-        print("DOWNLOADING YESTERDAY'S REGISTRATION REPORT")
-        print("="*60)
-        
-        # Set date range to include yesterday
-        # 7-day window to ensure we have enough rows in the table
-        start_date = yesterday - timedelta(days=6)
-        set_date_range_and_search(page, start_date, today)
-        
-        # Click on the 3rd row's total and download
-        report_path = click_third_row_total_and_download(page)
-        print("✅ Downloaded (yesterday's data):", report_path)
-
-        context.close()
+        if cs.SCRAPER_MODE == 'record':
+            save_recording(report_path, today)
+
+        context.close()              # flushes the HAR in record mode
         browser.close()
 
+    if cs.SCRAPER_MODE == 'replay':
+        verify_replay(report_path)
+    print(f"⏱  Scrape ({cs.SCRAPER_MODE}) took {time.perf_counter() - started:.1f}s")
+
     return report_path
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
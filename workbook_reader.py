@@ -0,0 +1,155 @@
+"""
+SHARED READ-ONLY WORKBOOK ACCESS
+================================
+Every place that only *reads* an xlsx goes through here instead of
+pd.read_excel / openpyxl.load_workbook in full mode:
+
+- Workbooks are opened with read_only=True, so openpyxl streams just the
+  requested sheet instead of parsing every sheet into memory. Reading the
+  small Template sheet no longer pays for the large raw-data sheet.
+- Only the requested columns are kept while streaming.
+- Parsed sheets are cached for the lifetime of the process, one entry per
+  file and view. The entry remembers the file's size and modification time,
+  so a rewritten file is re-read and replaces its old entry.
+"""
+
+import os
+import threading
+
+import pandas as pd
+from openpyxl import load_workbook
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cached(path, view, loader):
+    """
+    Return the cached value for (path, view), reloading when the file changed
+
+    Keyed on the path alone: a rewritten file overwrites its previous entry
+    instead of adding another copy (report_service.py runs for days).
+    """
+    key = (os.path.abspath(path), view)
+    version = _file_version(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+    value = loader()
+    with _cache_lock:
+        _cache[key] = (version, value)
+    return value
+
+
+def _open_sheet(wb, sheet_name):
+    if isinstance(sheet_name, int):
+        return wb.worksheets[sheet_name]
+    return wb[sheet_name]
+
+
+def read_sheet(path, sheet_name=0, columns=None):
+    """
+    Read one sheet into a DataFrame (first row is the header)
+
+    Parameters:
+    path (str): Path to the xlsx file
+    sheet_name (str|int): Sheet name or 0-based position (default: first sheet)
+    columns (list): Column names or 0-based positions to keep (default: all)
+
+    The returned DataFrame is shared between callers; copy it before mutating.
+    """
+    view = ('sheet', sheet_name, tuple(columns) if columns else None)
+
+    def load():
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = _open_sheet(wb, sheet_name).iter_rows(values_only=True)
+            header = list(next(rows, ()))
+
+            if columns is None:
+                indices = list(range(len(header)))
+            else:
+                indices = [c if isinstance(c, int) else header.index(c) for c in columns]
+
+            data = []
+            for row in rows:
+                values = [row[i] if i < len(row) else None for i in indices]
+                if any(v is not None for v in values):
+                    data.append(values)
+        finally:
+            wb.close()
+
+        names = [header[i] if header[i] is not None else f"Unnamed: {i}" for i in indices]
+        return pd.DataFrame(data, columns=names)
+
+    return _cached(path, view, load)
+
+
+def read_sheet_cells(path, sheet_name):
+    """
+    Read the values and basic styling of one sheet, for rendering it as an image
+
+    Returns (sheet title, rows) where each row is a list of
+    (text, bold, fill ARGB or None) tuples. Falls back to the first sheet when
+    sheet_name doesn't exist.
+    """
+    view = ('cells', sheet_name)
+
+    def load():
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.worksheets[0]
+            rows = []
+            for row in ws.iter_rows():
+                cells = []
+                for cell in row:
+                    text = str(cell.value) if cell.value is not None else ''
+                    bold = bool(cell.font.bold) if cell.font else False
+                    fill = None
+                    if cell.fill and cell.fill.start_color is not None:
+                        fill = getattr(cell.fill.start_color, 'rgb', None)
+                    cells.append((text, bold, fill if isinstance(fill, str) else None))
+                rows.append(cells)
+            title = ws.title
+        finally:
+            wb.close()
+
+        # Read-only rows can be ragged; pad them to the widest row
+        width = max((len(r) for r in rows), default=0)
+        for r in rows:
+            r.extend([('', False, None)] * (width - len(r)))
+        return title, rows
+
+    return _cached(path, view, load)
+
+
+def sheet_names(path):
+    """Sheet names of a workbook without loading any sheet."""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def custom_property(path, name):
+    """Value of a custom document property (File > Properties > Custom), or None."""
+    wb = load_workbook(path, read_only=True)
+    try:
+        for prop in wb.custom_doc_props.props:
+            if prop.name == name:
+                return prop.value
+        return None
+    finally:
+        wb.close()
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()